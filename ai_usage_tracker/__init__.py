@@ -6,7 +6,15 @@ __version__ = "0.1.0"
 __author__ = "Autonomous Initiatives"
 __description__ = "Track AI API usage and costs across multiple providers"
 
-from .database import Database
-from .cli import main
+__all__ = ["Database", "main"]
 
-__all__ = ["Database", "main"]
\ No newline at end of file
+
+def __getattr__(name):
+    """Import Database and main on first use so importing the package stays cheap"""
+    if name == "Database":
+        from .database import Database
+        return Database
+    if name == "main":
+        from .cli import main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
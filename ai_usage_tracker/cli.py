@@ -2,14 +2,93 @@
 CLI interface for AI Usage Tracker
 """
 
-import argparse
+import atexit
+import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from .database import Database
+from types import SimpleNamespace
 
-def main():
-    """Main CLI entry point"""
+# Write buffer for export files
+EXPORT_BUFFER_SIZE = 1 << 20
+# Rows fetched per round trip when exporting
+EXPORT_FETCH_SIZE = 10000
+# Seconds a computed summary is reused before being recomputed
+SUMMARY_CACHE_TTL = 60
+# Days covered by each --period choice ("all" has no cutoff)
+PERIOD_DAYS = {"day": 0, "week": 7, "month": 30}
+
+# Set to "1" to print the full traceback when a command fails
+DEBUG_ENV = "AI_USAGE_DEBUG"
+
+# Connected Database shared by everything run in this process (see get_db)
+_DB_SINGLETON = None
+
+def main(argv=None):
+    """
+    Main CLI entry point
+    
+    Args:
+        argv: Arguments without the program name (default: sys.argv[1:])
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    # Common argument-free invocations skip argparse altogether
+    fast_args = FAST_PATH_ARGS.get(tuple(argv))
+    if fast_args is not None:
+        _run_command(None, SimpleNamespace(**fast_args))
+        return
+    
+    # Only the subparser for the requested command is built; help and
+    # unknown commands get the full parser
+    command = argv[0] if argv else None
+    parser = build_parser(command)
+    
+    # Parse arguments
+    args = parser.parse_args(argv)
+    _run_command(parser, args)
+
+def main_batch(argv_list):
+    """
+    Run several command lines in this process, building the parser once
+    
+    Args:
+        argv_list: Argument lists, one per command, without the program name
+    """
+    parser = build_parser()
+    for argv in argv_list:
+        _run_command(parser, parser.parse_args(argv))
+
+def _run_command(parser, args):
+    """Dispatch parsed arguments to their command, exiting on failure"""
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+    
+    # Execute command
+    try:
+        COMMANDS[args.command](args)
+    except Exception as e:
+        # Failures normally cost one line; traceback is only loaded on request
+        if os.environ.get(DEBUG_ENV) == "1":
+            import traceback
+            traceback.print_exc()
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def build_parser(command=None):
+    """
+    Build the argument parser
+    
+    Args:
+        command: If this names a known command, only that command's
+                 subparser is added; otherwise all of them are
+    """
+    # Imported here so fast-path commands never load argparse
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Track AI API usage and costs across multiple providers",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -25,28 +104,43 @@ Examples:
     
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
     
-    # init command
+    if command in PARSER_BUILDERS:
+        PARSER_BUILDERS[command](subparsers)
+    else:
+        for add_command_parser in PARSER_BUILDERS.values():
+            add_command_parser(subparsers)
+    
+    return parser
+
+def _add_init_parser(subparsers):
+    """init command"""
     init_parser = subparsers.add_parser("init", help="Initialize database")
     init_parser.add_argument("--db-path", help="Database path (default: ~/.local/share/ai-usage-tracker/usage.db)")
-    
-    # status command
+
+def _add_status_parser(subparsers):
+    """status command"""
     status_parser = subparsers.add_parser("status", help="Show database status")
     status_parser.add_argument("--db-path", help="Database path")
-    
-    # parse command
+
+def _add_parse_parser(subparsers):
+    """parse command"""
     parse_parser = subparsers.add_parser("parse", help="Parse session logs")
     parse_parser.add_argument("path", help="Path to session logs directory")
     parse_parser.add_argument("--db-path", help="Database path")
     parse_parser.add_argument("--recursive", "-r", action="store_true", help="Parse recursively")
-    
-    # summary command
+    parse_parser.add_argument("--jobs", "-j", type=int, 
+                             help="Number of parallel parse workers (default: CPU count)")
+
+def _add_summary_parser(subparsers):
+    """summary command"""
     summary_parser = subparsers.add_parser("summary", help="Show usage summary")
     summary_parser.add_argument("--db-path", help="Database path")
     summary_parser.add_argument("--period", choices=["day", "week", "month", "all"], default="month", 
                                help="Time period for summary")
     summary_parser.add_argument("--provider", help="Filter by provider")
-    
-    # budget command
+
+def _add_budget_parser(subparsers):
+    """budget command"""
     budget_parser = subparsers.add_parser("budget", help="Manage budgets")
     budget_parser.add_argument("--db-path", help="Database path")
     budget_subparsers = budget_parser.add_subparsers(dest="budget_command", help="Budget command")
@@ -67,8 +161,9 @@ Examples:
     # budget delete
     budget_delete = budget_subparsers.add_parser("delete", help="Delete budget")
     budget_delete.add_argument("budget_id", type=int, help="Budget ID to delete")
-    
-    # monitor command
+
+def _add_monitor_parser(subparsers):
+    """monitor command"""
     monitor_parser = subparsers.add_parser("monitor", help="Monitor session logs in real-time")
     monitor_parser.add_argument("path", help="Path to session logs directory")
     monitor_parser.add_argument("--db-path", help="Database path")
@@ -76,8 +171,9 @@ Examples:
                                help="Polling interval in seconds (default: 10)")
     monitor_parser.add_argument("--watch", action="store_true", 
                                help="Watch for file changes (inotify)")
-    
-    # export command
+
+def _add_export_parser(subparsers):
+    """export command"""
     export_parser = subparsers.add_parser("export", help="Export usage data")
     export_parser.add_argument("--db-path", help="Database path")
     export_parser.add_argument("--format", choices=["csv", "json"], default="csv", 
@@ -85,54 +181,57 @@ Examples:
     export_parser.add_argument("--output", "-o", help="Output file path")
     export_parser.add_argument("--period", choices=["day", "week", "month", "all"], default="all", 
                               help="Time period to export")
-    
-    # providers command
+
+def _add_providers_parser(subparsers):
+    """providers command"""
     providers_parser = subparsers.add_parser("providers", help="List providers and models")
     providers_parser.add_argument("--db-path", help="Database path")
+
+def get_db(db_path=None, read_only=False):
+    """
+    Return the process-wide Database connection, opening it on first use
     
-    # Parse arguments
-    args = parser.parse_args()
+    The connection stays open for the life of the process and is closed at
+    exit, so commands (and monitor polls) don't pay for reopening SQLite.
+    Asking for a different database path, or for writing through a
+    read-only connection, replaces the shared connection.
+    """
+    global _DB_SINGLETON
+    from .database import Database
     
-    if not args.command:
-        parser.print_help()
-        sys.exit(1)
+    db = Database(db_path)
+    if (_DB_SINGLETON is not None and _DB_SINGLETON.db_path == db.db_path
+            and (read_only or not _DB_SINGLETON.read_only)):
+        return _DB_SINGLETON
     
-    # Execute command
-    try:
-        if args.command == "init":
-            cmd_init(args)
-        elif args.command == "status":
-            cmd_status(args)
-        elif args.command == "parse":
-            cmd_parse(args)
-        elif args.command == "summary":
-            cmd_summary(args)
-        elif args.command == "budget":
-            cmd_budget(args)
-        elif args.command == "monitor":
-            cmd_monitor(args)
-        elif args.command == "export":
-            cmd_export(args)
-        elif args.command == "providers":
-            cmd_providers(args)
-        else:
-            print(f"Unknown command: {args.command}")
-            sys.exit(1)
-            
-    except Exception as e:
-        print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
+    if _DB_SINGLETON is None:
+        atexit.register(_close_db)
+    else:
+        _DB_SINGLETON.close()
+        _DB_SINGLETON = None
+    
+    if read_only:
+        db.connect_ro()
+    else:
+        db.connect()
+    _DB_SINGLETON = db
+    return db
+
+def _close_db():
+    """Close the shared Database connection"""
+    if _DB_SINGLETON is not None:
+        _DB_SINGLETON.close()
 
 def cmd_init(args):
     """Initialize database command"""
+    from .database import Database
     db = Database(args.db_path)
     db.initialize()
     print("✅ Database initialized successfully")
 
 def cmd_status(args):
     """Show database status command"""
-    db = Database(args.db_path)
-    db.connect()
+    db = get_db(args.db_path, read_only=True)
     
     # Get table info
     tables = db.get_table_info()
@@ -148,10 +247,10 @@ def cmd_status(args):
     
     # Get total usage stats
     db.cursor.execute("""
-    SELECT COUNT(*) as entries, 
+    SELECT COALESCE(SUM(requests), 0) as entries, 
            SUM(total_cost) as total_cost,
            SUM(input_tokens + output_tokens) as total_tokens
-    FROM usage_entries
+    FROM usage_daily
     """)
     
     stats = db.cursor.fetchone()
@@ -161,8 +260,6 @@ def cmd_status(args):
         print(f"Total entries: {stats[0]}")
         print(f"Total tokens: {stats[2]:,}")
         print(f"Total cost: ${stats[1]:.4f}")
-    
-    db.close()
 
 def cmd_parse(args):
     """Parse session logs command"""
@@ -170,14 +267,23 @@ def cmd_parse(args):
     
     print(f"🔍 Parsing session logs from: {args.path}")
     
-    # Initialize parser
-    parser = SessionParser(args.db_path)
+    # Run the whole parse in one transaction so entries aren't committed row by row
+    db = get_db(args.db_path)
+    parser = SessionParser(db=db)
     
-    # Parse directory
-    files_processed, entries_processed = parser.parse_directory(
-        args.path, 
-        recursive=args.recursive
-    )
+    try:
+        db.conn.execute("BEGIN")
+        files_processed, entries_processed = parser.parse_directory(
+            args.path, 
+            recursive=args.recursive,
+            jobs=args.jobs or os.cpu_count() or 1
+        )
+        db.conn.commit()
+        db.optimize()
+    except Exception:
+        db.conn.rollback()
+        parser.clear_caches()
+        raise
     
     print(f"\n✅ Parsing complete")
     print(f"   Files processed: {files_processed}")
@@ -189,128 +295,182 @@ def cmd_parse(args):
         print("   - Files are in JSONL format (.jsonl extension)")
         print("   - Files contain usage data from AI API calls")
 
-def cmd_summary(args):
-    """Show usage summary command"""
-    db = Database(args.db_path)
-    db.connect()
-    
-    # Build WHERE clause based on period
-    if args.period == "day":
-        where_clause = "WHERE date(timestamp) = date('now')"
-    elif args.period == "week":
-        where_clause = "WHERE timestamp >= date('now', '-7 days')"
-    elif args.period == "month":
-        where_clause = "WHERE timestamp >= date('now', '-30 days')"
-    else:
-        where_clause = ""
+def _period_cutoff(period):
+    """Return the UTC date a period starts on, or None for all time"""
+    days = PERIOD_DAYS.get(period)
+    if days is None:
+        return None
     
-    # Add provider filter if specified
-    if args.provider:
-        if where_clause:
-            where_clause += f" AND p.name = '{args.provider}'"
-        else:
-            where_clause = f"WHERE p.name = '{args.provider}'"
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
+
+def _build_where_clause(has_cutoff, has_provider=False, time_column="u.timestamp"):
+    """Build a WHERE clause with placeholders for the period cutoff and provider"""
+    conditions = []
+    if has_cutoff:
+        conditions.append(f"{time_column} >= ?")
+    if has_provider:
+        conditions.append("p.name = ?")
+    
+    if not conditions:
+        return ""
+    return "WHERE " + " AND ".join(conditions)
+
+@lru_cache(maxsize=None)
+def _summary_query(has_cutoff, has_provider):
+    """
+    Summary query text, built once per filter combination
     
-    query = f"""
-    SELECT 
-        p.name as provider,
-        m.name as model,
-        COUNT(*) as requests,
-        SUM(u.input_tokens) as input_tokens,
-        SUM(u.output_tokens) as output_tokens,
-        SUM(u.total_cost) as total_cost
-    FROM usage_entries u
-    JOIN models m ON u.model_id = m.id
-    JOIN providers p ON m.provider_id = p.id
-    {where_clause}
-    GROUP BY p.name, m.name
-    ORDER BY total_cost DESC
+    Reads the per-day totals in usage_daily; cutoffs are whole days, so
+    this matches summing usage_entries directly.
+    
+    SQLite has no GROUP BY ... WITH ROLLUP, so the grand total is appended
+    as a final row (provider and model NULL) computed from the grouped rows.
     """
+    return f"""
+    SELECT * FROM (
+        WITH grouped AS (
+            SELECT 
+                p.name as provider,
+                m.name as model,
+                SUM(d.requests) as requests,
+                SUM(d.input_tokens) as input_tokens,
+                SUM(d.output_tokens) as output_tokens,
+                SUM(d.total_cost) as total_cost
+            FROM usage_daily d
+            JOIN models m ON d.model_id = m.id
+            JOIN providers p ON d.provider_id = p.id
+            {_build_where_clause(has_cutoff, has_provider, time_column="d.day")}
+            GROUP BY p.name, m.name
+        )
+        SELECT * FROM grouped
+        UNION ALL
+        SELECT NULL, NULL,
+               COALESCE(SUM(requests), 0),
+               COALESCE(SUM(input_tokens), 0),
+               COALESCE(SUM(output_tokens), 0),
+               COALESCE(SUM(total_cost), 0.0)
+        FROM grouped
+    )
+    ORDER BY provider IS NULL, total_cost DESC
+    """
+
+def cmd_summary(args):
+    """Show usage summary command"""
+    import json
+    db = get_db(args.db_path)
+    
+    # Bind the period cutoff and provider rather than formatting them into the SQL
+    cutoff = _period_cutoff(args.period)
+    params = [value for value in (cutoff, args.provider) if value]
+    query = _summary_query(cutoff is not None, bool(args.provider))
+    
+    # Reuse a recently computed summary for the same period/provider. The
+    # cutoff is part of the key, so once a period's start moves (e.g. past
+    # midnight for "day") the summary cached for the old window isn't reused.
+    period_key = f"{args.period}:{cutoff}" if cutoff else args.period
+    cache_key = (period_key, args.provider or "")
+    fresh_after = datetime.now(timezone.utc) - timedelta(seconds=SUMMARY_CACHE_TTL)
+    db.cursor.execute("""
+    SELECT payload FROM summary_cache
+    WHERE period = ? AND provider = ? AND computed_at >= ?
+    """, cache_key + (fresh_after.strftime("%Y-%m-%d %H:%M:%S"),))
+    cached = db.cursor.fetchone()
     
-    db.cursor.execute(query)
-    results = db.cursor.fetchall()
+    if cached:
+        results = json.loads(cached[0])
+    else:
+        db.cursor.execute(query, params)
+        results = db.cursor.fetchall()
+        db.cursor.execute("""
+        INSERT OR REPLACE INTO summary_cache (period, provider, computed_at, payload)
+        VALUES (?, ?, CURRENT_TIMESTAMP, ?)
+        """, cache_key + (json.dumps(results),))
+        db.conn.commit()
     
-    print(f"📊 Usage Summary ({args.period})")
-    print("=" * 80)
-    print(f"{'Provider':15} {'Model':25} {'Requests':>10} {'Input':>10} {'Output':>10} {'Cost':>10}")
-    print("-" * 80)
+    # Format the whole table first and write it in one call
+    lines = [
+        f"📊 Usage Summary ({args.period})",
+        "=" * 80,
+        f"{'Provider':15} {'Model':25} {'Requests':>10} {'Input':>10} {'Output':>10} {'Cost':>10}",
+        "-" * 80,
+    ]
     
-    total_requests = 0
-    total_input = 0
-    total_output = 0
-    total_cost = 0.0
+    total_requests, total_input, total_output, total_cost = 0, 0, 0, 0.0
     
     for row in results:
         provider, model, requests, input_tokens, output_tokens, cost = row
-        print(f"{provider:15} {model:25} {requests:>10} {input_tokens:>10,} {output_tokens:>10,} ${cost:>9.4f}")
-        
-        total_requests += requests
-        total_input += input_tokens
-        total_output += output_tokens
-        total_cost += cost
+        if provider is None:
+            # Totals row computed by the query
+            total_requests, total_input, total_output, total_cost = requests, input_tokens, output_tokens, cost
+            continue
+        lines.append(f"{provider:15} {model:25} {requests:>10} {input_tokens:>10,} {output_tokens:>10,} ${cost:>9.4f}")
     
-    print("-" * 80)
-    print(f"{'TOTAL':41} {total_requests:>10} {total_input:>10,} {total_output:>10,} ${total_cost:>9.4f}")
+    lines.append("-" * 80)
+    lines.append(f"{'TOTAL':41} {total_requests:>10} {total_input:>10,} {total_output:>10,} ${total_cost:>9.4f}")
     
     if total_requests == 0:
-        print("\nℹ️  No usage data found for the specified period")
+        lines.append("\nℹ️  No usage data found for the specified period")
     
-    db.close()
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def cmd_budget(args):
     """Manage budgets command"""
-    db = Database(args.db_path)
-    db.connect()
+    from .database import SQLITE_HAS_RETURNING
+    db = get_db(args.db_path)
     
     if args.budget_command == "set":
-        # Set budget
-        provider_id = None
-        model_id = None
+        budget = {
+            "provider": args.provider,
+            "model": args.model,
+            "period": args.period,
+            "amount": args.amount,
+            "threshold": args.threshold,
+        }
         
-        if args.provider:
-            db.cursor.execute("SELECT id FROM providers WHERE name = ?", (args.provider,))
-            result = db.cursor.fetchone()
-            if result:
-                provider_id = result[0]
-            else:
-                print(f"Error: Provider '{args.provider}' not found")
-                db.close()
-                return
+        # The budget already set for this scope, if any, so the result can
+        # be reported as created or updated
+        db.cursor.execute("""
+        SELECT id FROM budgets
+        WHERE IFNULL(provider_id, 0) = IFNULL((SELECT id FROM providers WHERE name = :provider), 0)
+          AND IFNULL(model_id, 0) = IFNULL((SELECT id FROM models WHERE model_id = :model), 0)
+          AND period = :period
+        """, budget)
+        existing = db.cursor.fetchone()
+        
+        # Create or update the budget in one statement; nothing is written
+        # when the named provider or model doesn't exist
+        db.cursor.execute("""
+        INSERT INTO budgets (provider_id, model_id, period, amount, alert_threshold)
+        SELECT (SELECT id FROM providers WHERE name = :provider),
+               (SELECT id FROM models WHERE model_id = :model),
+               :period, :amount, :threshold
+        WHERE (:provider IS NULL OR EXISTS (SELECT 1 FROM providers WHERE name = :provider))
+          AND (:model IS NULL OR EXISTS (SELECT 1 FROM models WHERE model_id = :model))
+        ON CONFLICT (IFNULL(provider_id, 0), IFNULL(model_id, 0), period) DO UPDATE SET
+            amount = excluded.amount,
+            alert_threshold = excluded.alert_threshold,
+            updated_at = CURRENT_TIMESTAMP
+        """ + ("RETURNING id" if SQLITE_HAS_RETURNING else ""), budget)
         
-        if args.model:
-            db.cursor.execute("SELECT id FROM models WHERE model_id = ?", (args.model,))
+        if SQLITE_HAS_RETURNING:
             result = db.cursor.fetchone()
-            if result:
-                model_id = result[0]
+        elif db.cursor.rowcount > 0:
+            result = existing or (db.cursor.lastrowid,)
+        else:
+            result = None
+        
+        if not result:
+            db.cursor.execute("SELECT 1 FROM providers WHERE name = ?", (args.provider,))
+            if args.provider and not db.cursor.fetchone():
+                print(f"Error: Provider '{args.provider}' not found")
             else:
                 print(f"Error: Model '{args.model}' not found")
-                db.close()
-                return
-        
-        # Check if budget already exists
-        db.cursor.execute("""
-        SELECT id FROM budgets 
-        WHERE provider_id IS ? AND model_id IS ? AND period = ?
-        """, (provider_id, model_id, args.period))
-        
-        existing = db.cursor.fetchone()
+            return
         
         if existing:
-            # Update existing budget
-            db.cursor.execute("""
-            UPDATE budgets 
-            SET amount = ?, alert_threshold = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-            """, (args.amount, args.threshold, existing[0]))
-            print(f"✅ Updated budget ID {existing[0]}")
+            print(f"✅ Updated budget ID {result[0]}")
         else:
-            # Insert new budget
-            db.cursor.execute("""
-            INSERT INTO budgets (provider_id, model_id, period, amount, alert_threshold)
-            VALUES (?, ?, ?, ?, ?)
-            """, (provider_id, model_id, args.period, args.amount, args.threshold))
-            print(f"✅ Created new budget ID {db.cursor.lastrowid}")
-        
+            print(f"✅ Created new budget ID {result[0]}")
         db.conn.commit()
         
     elif args.budget_command == "list":
@@ -354,53 +514,133 @@ def cmd_budget(args):
     
     else:
         print("Error: Budget command required (set, list, delete)")
+
+def _watch_session_files(path, changed, lock):
+    """
+    Start a watchdog observer that records modified session files
+    
+    Paths are added to the `changed` set (guarded by `lock`) so that all
+    parsing and database writes stay on the monitoring thread.
+    
+    Raises:
+        ImportError: If the watchdog package is not installed
+    """
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    
+    class SessionFileHandler(FileSystemEventHandler):
+        """Collect paths of created/modified .jsonl files"""
+        
+        def _record(self, file_path):
+            if file_path.endswith(".jsonl"):
+                with lock:
+                    changed.add(file_path)
+        
+        def on_created(self, event):
+            if not event.is_directory:
+                self._record(event.src_path)
+        
+        def on_modified(self, event):
+            if not event.is_directory:
+                self._record(event.src_path)
+        
+        def on_moved(self, event):
+            if not event.is_directory:
+                self._record(event.dest_path)
+    
+    observer = Observer()
+    observer.schedule(SessionFileHandler(), path, recursive=True)
+    observer.start()
+    return observer
+
+def _parse_session_files(parser, db, session_files):
+    """
+    Parse new data in session files, committed together, reporting each
+    file that had any
     
-    db.close()
+    Returns:
+        Number of entries saved
+    """
+    entries_processed = 0
+    with db.conn:
+        for session_file in session_files:
+            saved = parser.parse_file(str(session_file))
+            if saved:
+                print(f"  {session_file}: saved {saved} usage entries")
+            entries_processed += saved
+    return entries_processed
 
 def cmd_monitor(args):
     """Monitor session logs command"""
+    import threading
     import time
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
     from .parser import SessionParser
     
     print(f"👁️  Monitoring session logs at: {args.path}")
     print(f"   Polling interval: {args.interval} seconds")
     print(f"   Watch mode: {'Enabled' if args.watch else 'Disabled'}")
     
+    observer = None
+    changed = set()
+    changed_lock = threading.Lock()
+    
     if args.watch:
-        print("\n⚠️  Watch mode requires 'watchdog' package")
-        print("   Install with: pip install watchdog")
-        print("   Falling back to polling mode")
+        try:
+            observer = _watch_session_files(args.path, changed, changed_lock)
+        except ImportError:
+            print("\n⚠️  Watch mode requires 'watchdog' package")
+            print("   Install with: pip install watchdog")
+            print("   Falling back to polling mode")
     
-    # Initialize parser
-    parser = SessionParser(args.db_path)
+    # Initialize parser on the shared connection; each poll is committed below
+    db = get_db(args.db_path)
+    parser = SessionParser(db=db)
     
     print("\nStarting monitoring... (Press Ctrl+C to stop)")
     print("-" * 50)
     
+    total_entries = 0
     try:
+        # Start with everything already in the tree; in watch mode only
+        # files that change afterwards are reported by the observer
+        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Checking existing session files...")
+        total_entries += _parse_session_files(parser, db, Path(args.path).rglob("*.jsonl"))
+        if total_entries > 0:
+            print(f"   Found {total_entries} new usage entries")
         last_check = time.time()
-        total_entries = 0
         
         while True:
-            current_time = time.time()
-            
-            # Check if it's time to poll
-            if current_time - last_check >= args.interval:
-                print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Checking for new session files...")
+            entries_processed = 0
+            if observer is not None:
+                # Only parse the files the observer reported, plus (once per
+                # interval) those whose last line had no newline yet, as no
+                # further change may ever be reported for them
+                with changed_lock:
+                    changed_files = set(changed)
+                    changed.clear()
                 
-                files_processed, entries_processed = parser.parse_directory(
-                    args.path, 
-                    recursive=True
-                )
+                current_time = time.time()
+                if current_time - last_check >= args.interval:
+                    changed_files |= parser.partial_files
+                    last_check = current_time
                 
-                if entries_processed > 0:
-                    total_entries += entries_processed
-                    print(f"   Found {entries_processed} new usage entries")
-                    print(f"   Total entries processed: {total_entries}")
+                if changed_files:
+                    entries_processed = _parse_session_files(parser, db, sorted(changed_files))
+            else:
+                current_time = time.time()
                 
-                last_check = current_time
+                # Check if it's time to poll
+                if current_time - last_check >= args.interval:
+                    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Checking for new session files...")
+                    
+                    # Files are skipped unless they changed since the last poll
+                    entries_processed = _parse_session_files(parser, db, Path(args.path).rglob("*.jsonl"))
+                    last_check = current_time
+            
+            if entries_processed > 0:
+                total_entries += entries_processed
+                print(f"   Found {entries_processed} new usage entries")
+                print(f"   Total entries processed: {total_entries}")
             
             # Sleep for a short time to avoid busy waiting
             time.sleep(1)
@@ -408,33 +648,17 @@ def cmd_monitor(args):
     except KeyboardInterrupt:
         print(f"\n\n✅ Monitoring stopped")
         print(f"   Total entries processed during session: {total_entries}")
-    except ImportError as e:
-        print(f"\n❌ Error: {e}")
-        print("   Make sure required packages are installed:")
-        print("   pip install watchdog")
     except Exception as e:
         print(f"\n❌ Error: {e}")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
 
-def cmd_export(args):
-    """Export usage data command"""
-    import csv
-    import json
-    
-    db = Database(args.db_path)
-    db.connect()
-    
-    # Build WHERE clause based on period
-    if args.period == "day":
-        where_clause = "WHERE date(timestamp) = date('now')"
-    elif args.period == "week":
-        where_clause = "WHERE timestamp >= date('now', '-7 days')"
-    elif args.period == "month":
-        where_clause = "WHERE timestamp >= date('now', '-30 days')"
-    else:
-        where_clause = ""
-    
-    # Query usage data
-    query = f"""
+@lru_cache(maxsize=None)
+def _export_query(has_cutoff):
+    """Export query text, built once per filter combination"""
+    return f"""
     SELECT 
         u.timestamp,
         p.name as provider,
@@ -446,16 +670,28 @@ def cmd_export(args):
     FROM usage_entries u
     JOIN models m ON u.model_id = m.id
     JOIN providers p ON m.provider_id = p.id
-    {where_clause}
+    {_build_where_clause(has_cutoff)}
     ORDER BY u.timestamp
     """
+
+def cmd_export(args):
+    """Export usage data command"""
+    import csv
+    from .serialization import dumps, loads, unpack
     
-    db.cursor.execute(query)
-    rows = db.cursor.fetchall()
+    db = get_db(args.db_path, read_only=True)
+    
+    cutoff = _period_cutoff(args.period)
+    params = [cutoff] if cutoff else []
+    query = _export_query(cutoff is not None)
+    
+    # Fetch in chunks so memory stays bounded on large exports
+    db.cursor.arraysize = EXPORT_FETCH_SIZE
+    db.cursor.execute(query, params)
+    rows = db.cursor.fetchmany()
     
     if not rows:
         print("No usage data found to export")
-        db.close()
         return
     
     # Determine output file
@@ -465,65 +701,72 @@ def cmd_export(args):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file = f"ai_usage_export_{timestamp}.{args.format}"
     
-    print(f"Exporting {len(rows)} usage entries to {output_file} ({args.format} format)")
+    print(f"Exporting usage entries to {output_file} ({args.format} format)")
+    exported = 0
     
     try:
         if args.format == "csv":
             # Export as CSV
-            with open(output_file, 'w', newline='') as f:
+            with open(output_file, 'w', newline='', buffering=EXPORT_BUFFER_SIZE) as f:
                 writer = csv.writer(f)
-                # Write header
                 writer.writerow(['timestamp', 'provider', 'model', 'input_tokens', 
                                'output_tokens', 'total_cost', 'metadata'])
-                
-                # Write data
-                for row in rows:
-                    writer.writerow(row)
+                while rows:
+                    writer.writerows(row[:6] + (row[6] and unpack(row[6]),) for row in rows)
+                    exported += len(rows)
+                    rows = db.cursor.fetchmany()
             
-            print(f"✅ CSV export complete: {output_file}")
+            print(f"✅ CSV export complete: {output_file} ({exported} entries)")
             
         elif args.format == "json":
-            # Export as JSON
-            data = []
-            for row in rows:
-                entry = {
-                    'timestamp': row[0],
-                    'provider': row[1],
-                    'model': row[2],
-                    'input_tokens': row[3],
-                    'output_tokens': row[4],
-                    'total_cost': row[5],
-                    'metadata': json.loads(row[6]) if row[6] else {}
-                }
-                data.append(entry)
-            
-            with open(output_file, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            # Export as JSON, one array element per line, written as we go
+            with open(output_file, 'wb', buffering=EXPORT_BUFFER_SIZE) as f:
+                separator = b"[\n  "
+                while rows:
+                    for row in rows:
+                        entry = {
+                            'timestamp': row[0],
+                            'provider': row[1],
+                            'model': row[2],
+                            'input_tokens': row[3],
+                            'output_tokens': row[4],
+                            'total_cost': row[5],
+                            'metadata': loads(unpack(row[6])) if row[6] else {}
+                        }
+                        f.write(separator)
+                        f.write(dumps(entry))
+                        separator = b",\n  "
+                    exported += len(rows)
+                    rows = db.cursor.fetchmany()
+                f.write(b"\n]\n")
             
-            print(f"✅ JSON export complete: {output_file}")
+            print(f"✅ JSON export complete: {output_file} ({exported} entries)")
     
     except Exception as e:
         print(f"❌ Export failed: {e}")
-    
-    db.close()
 
 def cmd_providers(args):
     """List providers and models command"""
-    db = Database(args.db_path)
-    db.connect()
+    db = get_db(args.db_path, read_only=True)
     
+    # Count usage per model first (from the model_id index), then join the
+    # small per-model result instead of grouping the full joined table
     query = """
+    WITH counts AS (
+        SELECT model_id, COUNT(*) as usage_count
+        FROM usage_entries
+        GROUP BY model_id
+    )
     SELECT 
         p.name as provider,
         m.model_id,
         m.name as model_name,
         m.input_cost,
         m.output_cost,
-        COUNT(u.id) as usage_count
+        COALESCE(counts.usage_count, 0) as usage_count
     FROM providers p
     JOIN models m ON p.id = m.provider_id
-    LEFT JOIN usage_entries u ON m.id = u.model_id
-    GROUP BY p.name, m.model_id, m.name, m.input_cost, m.output_cost
+    LEFT JOIN counts ON counts.model_id = m.id
     ORDER BY p.name, m.name
     """
     
@@ -548,8 +791,40 @@ def cmd_providers(args):
     
     if not providers:
         print("No providers configured")
-    
-    db.close()
+
+# Command name -> handler, used by main() to dispatch
+COMMANDS = {
+    "init": cmd_init,
+    "status": cmd_status,
+    "parse": cmd_parse,
+    "summary": cmd_summary,
+    "budget": cmd_budget,
+    "monitor": cmd_monitor,
+    "export": cmd_export,
+    "providers": cmd_providers,
+}
+
+# Argument lists main() dispatches without argparse -> the namespace
+# argparse would have produced for them (keep in sync with the parsers)
+FAST_PATH_ARGS = {
+    ("init",): {"command": "init", "db_path": None},
+    ("status",): {"command": "status", "db_path": None},
+    ("providers",): {"command": "providers", "db_path": None},
+    ("summary",): {"command": "summary", "db_path": None, "period": "month", "provider": None},
+    ("budget", "list"): {"command": "budget", "db_path": None, "budget_command": "list"},
+}
+
+# Command name -> function adding its subparser, in help order
+PARSER_BUILDERS = {
+    "init": _add_init_parser,
+    "status": _add_status_parser,
+    "parse": _add_parse_parser,
+    "summary": _add_summary_parser,
+    "budget": _add_budget_parser,
+    "monitor": _add_monitor_parser,
+    "export": _add_export_parser,
+    "providers": _add_providers_parser,
+}
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
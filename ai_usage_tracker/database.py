@@ -9,9 +9,298 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+# Applied to every connection after it is opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    # Fewer fsyncs; safe with WAL (a crash can only lose the last commits)
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    # 64 MiB page cache and up to 256 MiB memory-mapped I/O
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+)
+
+# Compiled statements kept per connection (sqlite3 defaults to 128)
+STATEMENT_CACHE_SIZE = 512
+
+# INSERT ... RETURNING needs SQLite 3.35
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Version of SCHEMA_SQL, stored in the database as PRAGMA user_version.
+# Bump it whenever SCHEMA_SQL changes so existing databases are upgraded.
+SCHEMA_VERSION = 1
+
+def configure_connection(conn, db_path, read_only=False):
+    """Apply the performance and integrity settings to a new connection"""
+    # journal_mode is stored in the database file, so it only has to be
+    # switched once, and only a writable database can be switched
+    if not read_only:
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if journal_mode.lower() != "wal" and os.access(db_path, os.W_OK):
+            conn.execute("PRAGMA journal_mode = WAL")
+    
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+def ensure_schema(conn, db_path, read_only=False):
+    """
+    Bring a database created by an earlier version up to the current schema
+    
+    Read-only connections can't upgrade, so an outdated database is an error
+    there, pointing at init.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    
+    if read_only:
+        raise RuntimeError(
+            f"Database schema is out of date: {db_path} "
+            f"(run 'ai-usage-tracker init' to upgrade)")
+    
+    # executescript commits any open transaction before it runs
+    conn.executescript(Database.SCHEMA_SQL)
+
 class Database:
     """SQLite database manager for usage tracking"""
     
+    # Whole schema as one script. Statements are idempotent, so it also
+    # brings databases created by earlier versions up to date.
+    SCHEMA_SQL = """
+    BEGIN;
+    
+    -- 1. providers table
+    CREATE TABLE IF NOT EXISTS providers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        base_url TEXT,
+        api_key_hash TEXT,
+        config_json TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- 2. models table
+    CREATE TABLE IF NOT EXISTS models (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        provider_id INTEGER NOT NULL,
+        model_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        context_window INTEGER,
+        max_tokens INTEGER,
+        input_cost REAL,
+        output_cost REAL,
+        cache_read_cost REAL,
+        cache_write_cost REAL,
+        supports_images BOOLEAN DEFAULT FALSE,
+        supports_reasoning BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (provider_id) REFERENCES providers(id),
+        UNIQUE(provider_id, model_id)
+    );
+    
+    -- 3. sessions table
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_key TEXT NOT NULL UNIQUE,
+        session_id TEXT,
+        source TEXT,
+        channel TEXT,
+        user_id TEXT,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        ended_at TIMESTAMP,
+        total_tokens INTEGER DEFAULT 0,
+        total_cost REAL DEFAULT 0.0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- 4. usage_entries table
+    CREATE TABLE IF NOT EXISTS usage_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        model_id INTEGER NOT NULL,
+        request_id TEXT,
+        input_tokens INTEGER DEFAULT 0,
+        output_tokens INTEGER DEFAULT 0,
+        cache_read_tokens INTEGER DEFAULT 0,
+        cache_write_tokens INTEGER DEFAULT 0,
+        input_cost REAL DEFAULT 0.0,
+        output_cost REAL DEFAULT 0.0,
+        cache_read_cost REAL DEFAULT 0.0,
+        cache_write_cost REAL DEFAULT 0.0,
+        total_cost REAL DEFAULT 0.0,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        metadata_json TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (session_id) REFERENCES sessions(id),
+        FOREIGN KEY (model_id) REFERENCES models(id)
+    );
+    
+    -- 5. budgets table
+    CREATE TABLE IF NOT EXISTS budgets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        provider_id INTEGER,
+        model_id INTEGER,
+        period TEXT NOT NULL,
+        amount REAL NOT NULL,
+        alert_threshold REAL DEFAULT 0.8,
+        enabled BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (provider_id) REFERENCES providers(id),
+        FOREIGN KEY (model_id) REFERENCES models(id)
+    );
+    
+    -- 6. alerts table
+    CREATE TABLE IF NOT EXISTS alerts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        budget_id INTEGER NOT NULL,
+        alert_type TEXT NOT NULL,
+        current_usage REAL NOT NULL,
+        current_budget REAL NOT NULL,
+        percentage REAL NOT NULL,
+        triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        acknowledged BOOLEAN DEFAULT FALSE,
+        acknowledged_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (budget_id) REFERENCES budgets(id)
+    );
+    
+    -- 7. summary_cache table
+    CREATE TABLE IF NOT EXISTS summary_cache (
+        period TEXT NOT NULL,
+        provider TEXT NOT NULL DEFAULT '',
+        computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (period, provider)
+    );
+    
+    -- 8. file_offsets table
+    CREATE TABLE IF NOT EXISTS file_offsets (
+        path TEXT PRIMARY KEY,
+        offset INTEGER NOT NULL DEFAULT 0,
+        mtime REAL
+    );
+    
+    -- 9. usage_daily table: per-day totals kept current by a trigger, so
+    -- reports read one row per model per day instead of every entry
+    CREATE TABLE IF NOT EXISTS usage_daily (
+        provider_id INTEGER NOT NULL,
+        model_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        requests INTEGER NOT NULL DEFAULT 0,
+        input_tokens INTEGER NOT NULL DEFAULT 0,
+        output_tokens INTEGER NOT NULL DEFAULT 0,
+        total_cost REAL NOT NULL DEFAULT 0.0,
+        PRIMARY KEY (provider_id, model_id, day)
+    ) WITHOUT ROWID;
+    
+    -- Create indexes for performance
+    CREATE INDEX IF NOT EXISTS idx_usage_entries_timestamp ON usage_entries(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_usage_entries_session_id ON usage_entries(session_id);
+    CREATE INDEX IF NOT EXISTS idx_usage_entries_model_id ON usage_entries(model_id);
+    CREATE INDEX IF NOT EXISTS idx_sessions_started_at ON sessions(started_at);
+    -- Day-range reports (summary --period) read usage_daily by day
+    CREATE INDEX IF NOT EXISTS idx_usage_daily_day ON usage_daily(day);
+    -- session_key is UNIQUE, which already indexes it; drop the duplicate
+    -- index created by earlier versions
+    DROP INDEX IF EXISTS idx_sessions_session_key;
+    
+    -- SQLite doesn't index foreign key columns automatically.
+    -- models(provider_id) is already covered by UNIQUE(provider_id, model_id).
+    CREATE INDEX IF NOT EXISTS idx_budgets_provider_id ON budgets(provider_id);
+    CREATE INDEX IF NOT EXISTS idx_budgets_model_id ON budgets(model_id);
+    CREATE INDEX IF NOT EXISTS idx_alerts_budget_id ON alerts(budget_id);
+    
+    -- One budget per provider/model/period (NULL means global/all models).
+    -- Databases from before the unique index may hold duplicates from
+    -- repeated init runs. Once, before the index is created, alerts are
+    -- moved to the oldest budget of their scope and the others removed.
+    UPDATE alerts SET budget_id = (
+        SELECT MIN(k.id) FROM budgets b
+        JOIN budgets k
+          ON IFNULL(k.provider_id, 0) = IFNULL(b.provider_id, 0)
+         AND IFNULL(k.model_id, 0) = IFNULL(b.model_id, 0)
+         AND k.period = b.period
+        WHERE b.id = alerts.budget_id
+    )
+    WHERE budget_id IN (SELECT id FROM budgets)
+      AND NOT EXISTS (
+          SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_budgets_scope'
+      );
+    DELETE FROM budgets
+    WHERE id NOT IN (
+        SELECT MIN(id) FROM budgets
+        GROUP BY IFNULL(provider_id, 0), IFNULL(model_id, 0), period
+    )
+      AND NOT EXISTS (
+          SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_budgets_scope'
+      );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_budgets_scope
+    ON budgets(IFNULL(provider_id, 0), IFNULL(model_id, 0), period);
+    
+    -- Create triggers for updated_at. Updates that set updated_at themselves
+    -- are left alone rather than written a second time. Recreated so older
+    -- databases pick up the guard.
+    DROP TRIGGER IF EXISTS update_providers_timestamp;
+    CREATE TRIGGER update_providers_timestamp
+    AFTER UPDATE ON providers
+    WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE providers SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+    
+    DROP TRIGGER IF EXISTS update_models_timestamp;
+    CREATE TRIGGER update_models_timestamp
+    AFTER UPDATE ON models
+    WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE models SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+    
+    DROP TRIGGER IF EXISTS update_budgets_timestamp;
+    CREATE TRIGGER update_budgets_timestamp
+    AFTER UPDATE ON budgets
+    WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE budgets SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+    
+    -- Fold each new usage entry into its day. The day is the timestamp's
+    -- date prefix, matching how reports compare timestamps to cutoffs.
+    CREATE TRIGGER IF NOT EXISTS update_usage_daily
+    AFTER INSERT ON usage_entries
+    BEGIN
+        INSERT INTO usage_daily
+        (provider_id, model_id, day, requests, input_tokens, output_tokens, total_cost)
+        VALUES (
+            (SELECT provider_id FROM models WHERE id = NEW.model_id),
+            NEW.model_id, substr(NEW.timestamp, 1, 10), 1,
+            NEW.input_tokens, NEW.output_tokens, NEW.total_cost
+        )
+        ON CONFLICT (provider_id, model_id, day) DO UPDATE SET
+            requests = requests + 1,
+            input_tokens = input_tokens + excluded.input_tokens,
+            output_tokens = output_tokens + excluded.output_tokens,
+            total_cost = total_cost + excluded.total_cost;
+    END;
+    
+    -- Entries saved before usage_daily existed
+    INSERT INTO usage_daily
+    (provider_id, model_id, day, requests, input_tokens, output_tokens, total_cost)
+    SELECT m.provider_id, u.model_id, substr(u.timestamp, 1, 10), COUNT(*),
+           SUM(u.input_tokens), SUM(u.output_tokens), SUM(u.total_cost)
+    FROM usage_entries u
+    JOIN models m ON u.model_id = m.id
+    WHERE NOT EXISTS (SELECT 1 FROM usage_daily)
+    GROUP BY m.provider_id, u.model_id, substr(u.timestamp, 1, 10);
+    
+    PRAGMA user_version = %d;
+    
+    COMMIT;
+    """ % SCHEMA_VERSION
+    
     def __init__(self, db_path=None):
         if db_path is None:
             # Default location
@@ -24,13 +313,33 @@ class Database:
         
         self.conn = None
         self.cursor = None
+        self.read_only = False
     
     def connect(self):
         """Connect to the database"""
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
         self.cursor = self.conn.cursor()
-        # Enable foreign keys
-        self.cursor.execute("PRAGMA foreign_keys = ON")
+        self.read_only = False
+        configure_connection(self.conn, self.db_path)
+        ensure_schema(self.conn, self.db_path)
+        return self.conn
+    
+    def connect_ro(self):
+        """Connect to an existing database for reading only"""
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(
+                f"Database not found: {self.db_path} (run 'ai-usage-tracker init' first)")
+        
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        self.conn = sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+        self.cursor = self.conn.cursor()
+        self.read_only = True
+        configure_connection(self.conn, self.db_path, read_only=True)
+        try:
+            ensure_schema(self.conn, self.db_path, read_only=True)
+        except RuntimeError:
+            self.close()
+            raise
         return self.conn
     
     def close(self):
@@ -42,187 +351,100 @@ class Database:
     
     def create_tables(self):
         """Create all database tables if they don't exist"""
-        self.connect()
+        owns_conn = self.conn is None
+        if owns_conn:
+            self.connect()
         
-        # 1. providers table
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS providers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            base_url TEXT,
-            api_key_hash TEXT,
-            config_json TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
+        # executescript commits any open transaction before it runs
+        self.conn.executescript(self.SCHEMA_SQL)
         
-        # 2. models table
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS models (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            provider_id INTEGER NOT NULL,
-            model_id TEXT NOT NULL,
-            name TEXT NOT NULL,
-            context_window INTEGER,
-            max_tokens INTEGER,
-            input_cost REAL,
-            output_cost REAL,
-            cache_read_cost REAL,
-            cache_write_cost REAL,
-            supports_images BOOLEAN DEFAULT FALSE,
-            supports_reasoning BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (provider_id) REFERENCES providers(id),
-            UNIQUE(provider_id, model_id)
-        )
-        """)
-        
-        # 3. sessions table
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_key TEXT NOT NULL UNIQUE,
-            session_id TEXT,
-            source TEXT,
-            channel TEXT,
-            user_id TEXT,
-            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            ended_at TIMESTAMP,
-            total_tokens INTEGER DEFAULT 0,
-            total_cost REAL DEFAULT 0.0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # 4. usage_entries table
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS usage_entries (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER NOT NULL,
-            model_id INTEGER NOT NULL,
-            request_id TEXT,
-            input_tokens INTEGER DEFAULT 0,
-            output_tokens INTEGER DEFAULT 0,
-            cache_read_tokens INTEGER DEFAULT 0,
-            cache_write_tokens INTEGER DEFAULT 0,
-            input_cost REAL DEFAULT 0.0,
-            output_cost REAL DEFAULT 0.0,
-            cache_read_cost REAL DEFAULT 0.0,
-            cache_write_cost REAL DEFAULT 0.0,
-            total_cost REAL DEFAULT 0.0,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            metadata_json TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (session_id) REFERENCES sessions(id),
-            FOREIGN KEY (model_id) REFERENCES models(id)
-        )
-        """)
-        
-        # 5. budgets table
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS budgets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            provider_id INTEGER,
-            model_id INTEGER,
-            period TEXT NOT NULL,
-            amount REAL NOT NULL,
-            alert_threshold REAL DEFAULT 0.8,
-            enabled BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (provider_id) REFERENCES providers(id),
-            FOREIGN KEY (model_id) REFERENCES models(id)
-        )
-        """)
-        
-        # 6. alerts table
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS alerts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            budget_id INTEGER NOT NULL,
-            alert_type TEXT NOT NULL,
-            current_usage REAL NOT NULL,
-            current_budget REAL NOT NULL,
-            percentage REAL NOT NULL,
-            triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            acknowledged BOOLEAN DEFAULT FALSE,
-            acknowledged_at TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (budget_id) REFERENCES budgets(id)
-        )
-        """)
-        
-        # Create indexes for performance
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_entries_timestamp ON usage_entries(timestamp)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_entries_session_id ON usage_entries(session_id)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_entries_model_id ON usage_entries(model_id)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_started_at ON sessions(started_at)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_session_key ON sessions(session_key)")
-        
-        # Create triggers for updated_at
-        self.cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_providers_timestamp 
-        AFTER UPDATE ON providers
-        BEGIN
-            UPDATE providers SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-        END
-        """)
-        
-        self.cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_models_timestamp 
-        AFTER UPDATE ON models
-        BEGIN
-            UPDATE models SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-        END
-        """)
-        
-        self.cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS update_budgets_timestamp 
-        AFTER UPDATE ON budgets
-        BEGIN
-            UPDATE budgets SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-        END
-        """)
-        
-        self.conn.commit()
-        self.close()
+        if owns_conn:
+            self.close()
         
         return True
     
     def get_table_info(self):
         """Get information about all tables"""
-        self.connect()
+        owns_conn = self.conn is None
+        if owns_conn:
+            self.connect()
         
         self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-        tables = self.cursor.fetchall()
+        table_names = [row[0] for row in self.cursor.fetchall()]
+        
+        # All counts in one statement. usage_entries is by far the largest
+        # table; usage_daily already holds its row count per day, which
+        # is much cheaper to sum than counting every entry.
+        counts = []
+        for table_name in table_names:
+            if table_name == "usage_entries" and "usage_daily" in table_names:
+                counts.append("SELECT COALESCE(SUM(requests), 0) FROM usage_daily")
+            else:
+                counts.append(f'SELECT COUNT(*) FROM "{table_name}"')
         
         result = []
-        for table in tables:
-            table_name = table[0]
-            self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = self.cursor.fetchone()[0]
-            result.append({"name": table_name, "row_count": count})
+        if counts:
+            self.cursor.execute(" UNION ALL ".join(counts))
+            for table_name, (count,) in zip(table_names, self.cursor.fetchall()):
+                result.append({"name": table_name, "row_count": count})
         
-        self.close()
+        if owns_conn:
+            self.close()
         return result
     
+    def analyze(self):
+        """Collect query planner statistics for all tables and indexes"""
+        owns_conn = self.conn is None
+        if owns_conn:
+            self.connect()
+        
+        self.cursor.execute("ANALYZE")
+        self.conn.commit()
+        
+        if owns_conn:
+            self.close()
+    
+    def optimize(self):
+        """Refresh planner statistics that have gone stale (cheap after bulk loads)"""
+        self.cursor.execute("PRAGMA optimize")
+    
     def initialize(self):
         """Initialize the database with default data"""
         print(f"Initializing database at: {self.db_path}")
         
-        # Create tables
-        self.create_tables()
-        
-        # Add default providers and models
-        self._add_default_providers()
+        # One connection for the whole bootstrap, closed afterwards only if
+        # it was opened here. The schema script runs in its own transaction,
+        # then the seed data is written in one more.
+        owns_conn = self.conn is None
+        if owns_conn:
+            self.connect()
         
-        # Create default budgets
-        self._create_default_budgets()
+        try:
+            # Create tables
+            self.create_tables()
+            
+            self.conn.execute("BEGIN")
+            
+            # Add default providers and models
+            self._add_default_providers()
+            
+            # Create default budgets
+            self._create_default_budgets()
+            
+            self.conn.commit()
+            
+            # Give the planner statistics for the reporting joins
+            self.analyze()
+            
+            # Show table info
+            tables = self.get_table_info()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            if owns_conn:
+                self.close()
         
-        # Show table info
-        tables = self.get_table_info()
         print(f"\nDatabase initialized with {len(tables)} tables:")
         for table in tables:
             print(f"  - {table['name']}: {table['row_count']} rows")
@@ -231,7 +453,9 @@ class Database:
     
     def _add_default_providers(self):
         """Add default AI providers and models"""
-        self.connect()
+        owns_conn = self.conn is None
+        if owns_conn:
+            self.connect()
         
         # Default providers data
         providers = [
@@ -294,12 +518,15 @@ class Database:
                     model_data["output_cost"]
                 ))
         
-        self.conn.commit()
-        self.close()
+        if owns_conn:
+            self.conn.commit()
+            self.close()
     
     def _create_default_budgets(self):
         """Create default budget configurations"""
-        self.connect()
+        owns_conn = self.conn is None
+        if owns_conn:
+            self.connect()
         
         # Get all provider IDs
         self.cursor.execute("SELECT id FROM providers")
@@ -330,5 +557,6 @@ class Database:
         VALUES (NULL, 'monthly', 200.0, 0.9)
         """)
         
-        self.conn.commit()
-        self.close()
\ No newline at end of file
+        if owns_conn:
+            self.conn.commit()
+            self.close()
\ No newline at end of file
@@ -3,87 +3,350 @@ Parser module for AI Usage Tracker
 Parses Clawdbot session logs to extract usage data
 """
 
+import hashlib
 import json
 import os
 import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain, islice
 from pathlib import Path
 import sqlite3
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .database import SQLITE_HAS_RETURNING, STATEMENT_CACHE_SIZE, configure_connection, ensure_schema
+from .serialization import loads, pack
+
+# Parse tasks allowed to wait for the database writer, per worker process
+PARSE_QUEUE_DEPTH = 2
+
+# Files handed to a worker per task; amortizes the round trip for the many
+# small session files a directory usually holds
+PARSE_CHUNK_SIZE = 4
+
+# Substrings identifying each provider, checked in priority order. Each
+# alternative is a lookahead from the start of the name, so the first
+# provider with a match anywhere in the name wins, not the leftmost match.
+PROVIDER_MODEL_PATTERNS = (
+    ('openai', ('gpt-', 'o1-', 'text-', 'dall-e')),
+    ('anthropic', ('claude-', 'anthropic')),
+    ('google', ('gemini-', 'palm-', 'google')),
+    ('deepseek', ('deepseek-',)),
+    ('cohere', ('command-', 'cohere')),
+    ('mistral', ('mistral-', 'mixtral')),
+)
+_PROVIDER_RE = re.compile("|".join(
+    f"(?=.*?(?:{'|'.join(map(re.escape, substrings))}))(?P<{provider}>)"
+    for provider, substrings in PROVIDER_MODEL_PATTERNS
+), re.DOTALL)
+
+# Set to 1 to keep raw log lines with usage entries
+KEEP_RAW_ENV = "AI_USAGE_KEEP_RAW"
+
+# Byte strings every usage line contains, checked before decoding JSON
+USAGE_MARKER = b'"usage"'
+ASSISTANT_MARKER = b'"assistant"'
+
+# Timestamps SQLite's date functions accept without conversion
+ISO_TIMESTAMP_RE = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?(?:Z|[+-]\d{2}:\d{2})?')
+
+# Statements run on the save path. Keeping them as module constants means
+# every call passes the identical SQL string, so each one is compiled once
+# and then served from the connection's statement cache. The cache belongs
+# to the connection, so the parser reuses one cursor rather than creating
+# cursors inside its loops.
+FILE_OFFSET_SELECT_SQL = "SELECT offset, mtime FROM file_offsets WHERE path = ?"
+FILE_OFFSET_SAVE_SQL = """
+INSERT OR REPLACE INTO file_offsets (path, offset, mtime)
+VALUES (?, ?, ?)
+"""
+PROVIDER_SELECT_SQL = "SELECT id FROM providers WHERE name = ?"
+PROVIDER_INSERT_SQL = """
+INSERT INTO providers (name, config_json)
+VALUES (?, ?)
+"""
+PARSED_PROVIDER_CONFIG = json.dumps({"source": "parsed_from_session"})
+MODEL_SELECT_SQL = """
+SELECT id FROM models 
+WHERE provider_id = ? AND model_id = ?
+"""
+MODEL_INSERT_SQL = """
+INSERT INTO models (provider_id, model_id, name)
+VALUES (?, ?, ?)
+"""
+MODEL_PRICING_SQL = """
+SELECT input_cost, output_cost 
+FROM models 
+WHERE id = ?
+"""
+SESSION_SELECT_SQL = "SELECT id FROM sessions WHERE session_key = ?"
+SESSION_INSERT_SQL = """
+INSERT INTO sessions (session_key, started_at)
+VALUES (?, ?)
+"""
+
+# Insert-if-missing in one statement (SQLITE_HAS_RETURNING only): RETURNING
+# yields the new row's id. An existing row yields nothing and is read with
+# the SELECT instead; it isn't touched, so its updated_at trigger doesn't fire.
+PROVIDER_UPSERT_SQL = PROVIDER_INSERT_SQL + """ON CONFLICT (name) DO NOTHING
+RETURNING id
+"""
+MODEL_UPSERT_SQL = MODEL_INSERT_SQL + """ON CONFLICT (provider_id, model_id) DO NOTHING
+RETURNING id
+"""
+SESSION_UPSERT_SQL = SESSION_INSERT_SQL + """ON CONFLICT (session_key) DO NOTHING
+RETURNING id
+"""
+
+# usage_entries insert: nine bound values per row, the cache columns are
+# always zero. Full batches go through one multi-row VALUES statement kept
+# under SQLite's default 999 variable limit; the remainder is inserted with
+# the single-row statement.
+USAGE_INSERT_SQL = """
+INSERT INTO usage_entries 
+(session_id, model_id, input_tokens, output_tokens, 
+ cache_read_tokens, cache_write_tokens, input_cost, output_cost,
+ cache_read_cost, cache_write_cost, total_cost, timestamp, metadata_json)
+VALUES """
+USAGE_ROW_PLACEHOLDER = "(?, ?, ?, ?, 0, 0, ?, ?, 0, 0, ?, ?, ?)"
+USAGE_COLS_PER_ROW = 9
+USAGE_ROWS_PER_STMT = 900 // USAGE_COLS_PER_ROW
+USAGE_INSERT_ROW_SQL = USAGE_INSERT_SQL + USAGE_ROW_PLACEHOLDER
+USAGE_INSERT_BATCH_SQL = USAGE_INSERT_SQL + ",".join([USAGE_ROW_PLACEHOLDER] * USAGE_ROWS_PER_STMT)
 
 class SessionParser:
     """Parser for Clawdbot session logs"""
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, db=None,
+                 store_raw: Optional[bool] = None):
+        """
+        Args:
+            db_path: Path to the SQLite database
+            db: Already-connected Database to write through. The caller owns
+                its transaction, so entries are not committed here.
+            store_raw: Keep each entry's raw log line in metadata_json, for
+                debugging. Defaults to the AI_USAGE_KEEP_RAW environment
+                variable being set to 1.
+        """
         self.db_path = db_path
+        self.db = db
+        if store_raw is None:
+            store_raw = os.environ.get(KEEP_RAW_ENV) == "1"
+        self.store_raw = store_raw
         self.conn = None
         self.cursor = None
         
+        # Files parse_file stopped short of because their last line had no
+        # newline yet; the monitor re-checks them even without a new change
+        self.partial_files = set()
+        
+        # Lookup caches for the ids written with each usage entry; filled
+        # from the database on first save and kept current on insert
+        self._caches_primed = False
+        self._provider_cache: Dict[str, int] = {}
+        self._model_cache: Dict[Tuple[int, str], int] = {}
+        self._session_cache: Dict[str, int] = {}
+        self._pricing_cache: Dict[int, Optional[Dict]] = {}
+        
+        if db is not None:
+            self.db_path = db.db_path
+            self.conn = db.conn
+            self.cursor = db.cursor
+        
     def connect(self):
         """Connect to database"""
-        if self.db_path:
-            self.conn = sqlite3.connect(self.db_path)
+        if self.db is not None:
+            self.conn = self.db.conn
+            self.cursor = self.db.cursor
+        elif self.db_path:
+            self.conn = sqlite3.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
             self.cursor = self.conn.cursor()
+            configure_connection(self.conn, self.db_path)
+            ensure_schema(self.conn, self.db_path)
         return self.conn
     
     def close(self):
         """Close database connection"""
-        if self.conn:
+        if self.db is not None:
+            # Shared connection is closed by its owner
+            self.conn = None
+            self.cursor = None
+        elif self.conn:
             self.conn.close()
             self.conn = None
             self.cursor = None
+        self.clear_caches()
+    
+    def clear_caches(self):
+        """
+        Forget cached provider/model/session ids
+        
+        Must be called after rolling back a transaction this parser wrote
+        to, since ids inserted in it no longer exist.
+        """
+        self._caches_primed = False
+        self._provider_cache.clear()
+        self._model_cache.clear()
+        self._session_cache.clear()
+        self._pricing_cache.clear()
     
-    def parse_session_file(self, file_path: str, incremental: bool = True, 
-                          last_processed_line: int = 0) -> Tuple[int, List[Dict]]:
+    def _prime_caches(self):
+        """Load all providers and models in two queries"""
+        self.cursor.execute("SELECT id, name FROM providers")
+        self._provider_cache.update((name, id_) for id_, name in self.cursor.fetchall())
+        
+        self.cursor.execute("SELECT id, provider_id, model_id, input_cost, output_cost FROM models")
+        for id_, provider_id, model_id, input_cost, output_cost in self.cursor.fetchall():
+            self._model_cache[(provider_id, model_id)] = id_
+            if input_cost is not None and output_cost is not None:
+                self._pricing_cache[id_] = {'input_cost': input_cost, 'output_cost': output_cost}
+            else:
+                self._pricing_cache[id_] = None
+        
+        self._caches_primed = True
+    
+    def parse_session_tail(self, file_path: str, offset: int = 0,
+                           final: bool = False) -> Tuple[List[Dict], int]:
         """
-        Parse a session JSONL file
+        Parse the complete lines written to a session file after a byte offset
+        
+        A trailing line without a newline is normally still being written,
+        so it is left for the next read. With final set it is parsed if it
+        already holds complete JSON; a half-written line is still left.
         
         Args:
             file_path: Path to session file
-            incremental: Whether to parse incrementally
-            last_processed_line: Last line processed (for incremental parsing)
+            offset: Byte offset to start reading from
+            final: The writer may be done with the file, so the end of the
+                   file can end the last line
             
         Returns:
-            Tuple of (entries_processed, list of usage entries)
+            Tuple of (list of usage entries, byte offset to resume from)
         """
-        if not os.path.exists(file_path):
-            return 0, []
-        
         entries = []
-        current_line = 0
-        entries_processed = 0
         
         try:
-            with open(file_path, 'r') as f:
-                for line_num, line in enumerate(f, 1):
-                    # Skip already processed lines for incremental parsing
-                    if incremental and line_num <= last_processed_line:
-                        continue
-                    
-                    current_line = line_num
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    try:
-                        data = json.loads(line)
-                        usage_entry = self._extract_usage_from_line(data)
-                        
-                        if usage_entry:
-                            entries.append(usage_entry)
-                            entries_processed += 1
-                            
-                    except json.JSONDecodeError as e:
-                        print(f"  Line {line_num}: JSON decode error: {e}")
-                        continue
-                    except Exception as e:
-                        print(f"  Line {line_num}: Error processing: {e}")
-                        continue
-                        
+            data = _read_lines(file_path, offset)
         except Exception as e:
             print(f"  Error reading file {file_path}: {e}")
+            return entries, offset
+        
+        end = data.rfind(b'\n') + 1
+        if final and end < len(data) and _is_complete_line(data[end:]):
+            end = len(data)
+        # Errors are reported by byte position in the file, which stays
+        # correct when reading resumes partway through
+        position = offset
+        for line in data[:end].split(b'\n'):
+            line_start = position
+            position += len(line) + 1
+            if not line or line.isspace():
+                continue
+            
+            usage_entry = self._parse_line(line, line_start)
+            if usage_entry:
+                entries.append(usage_entry)
+        
+        return entries, offset + end
+    
+    def _parse_line(self, line, position: int) -> Optional[Dict]:
+        """Decode one JSONL line and extract its usage entry, reporting bad lines"""
+        # Only assistant messages carry usage, and most lines aren't those.
+        # Rejecting on the raw bytes skips the JSON parser for them; lines
+        # that pass are still fully checked by _extract_usage_from_line.
+        if USAGE_MARKER not in line or ASSISTANT_MARKER not in line:
+            return None
+        
+        try:
+            data = loads(line)
+            return self._extract_usage_from_line(data)
+        except json.JSONDecodeError as e:
+            print(f"  Byte {position}: JSON decode error: {e}")
+        except Exception as e:
+            print(f"  Byte {position}: Error processing: {e}")
+        return None
+    
+    def parse_file(self, file_path: str) -> int:
+        """
+        Parse whatever was appended to a session file since it was last read
+        
+        The byte offset and mtime reached are stored in file_offsets within
+        the same transaction as the new usage entries, so unchanged files
+        are skipped and appended data is never saved twice.
+        
+        A last line without a newline is normally still being written and
+        is left for the next call. If the file hasn't changed since that
+        line was left and it holds complete JSON, its writer is taken to be
+        done and it is parsed; a half-written line keeps waiting.
+        
+        Args:
+            file_path: Path to session file
+            
+        Returns:
+            Number of entries saved
+        """
+        if not os.path.exists(file_path):
+            return 0
+        
+        if not self.conn:
+            self.connect()
+        
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        
+        resume = self._resume_offset(file_path, stat)
+        if resume is None:
+            self.partial_files.discard(file_path)
+            return 0
+        
+        offset, unchanged = resume
+        entries, offset = self.parse_session_tail(file_path, offset, final=unchanged)
+        if offset < stat.st_size:
+            self.partial_files.add(file_path)
+        else:
+            self.partial_files.discard(file_path)
+        return self._save_file_tail(file_path, entries, offset, stat.st_mtime)
+    
+    def _resume_offset(self, file_path: str,
+                       stat: os.stat_result) -> Optional[Tuple[int, bool]]:
+        """
+        Byte offset to resume a file from and whether the file is unchanged
+        since it was last read, or None if nothing was appended since then
+        """
+        self.cursor.execute(FILE_OFFSET_SELECT_SQL, (file_path,))
+        result = self.cursor.fetchone()
+        offset, mtime = result if result else (0, None)
+        
+        if mtime is not None and stat.st_mtime <= mtime and stat.st_size == offset:
+            return None
         
-        return entries_processed, entries
+        if stat.st_size < offset:
+            # File was truncated or replaced; start over
+            offset = 0
+        
+        return offset, stat.st_mtime == mtime
+    
+    def _unread_files(self, session_files: List[Path]) -> Iterator[Tuple[str, int, float]]:
+        """Yield (path, offset, mtime) for each file with unread data"""
+        for session_file in session_files:
+            file_path = os.path.abspath(session_file)
+            stat = os.stat(file_path)
+            
+            resume = self._resume_offset(file_path, stat)
+            if resume is not None:
+                yield file_path, resume[0], stat.st_mtime
+    
+    def _save_file_tail(self, file_path: str, entries: List[Dict],
+                        offset: int, mtime: float) -> int:
+        """Save the entries read from a file together with the offset reached"""
+        self.cursor.execute(FILE_OFFSET_SAVE_SQL, (file_path, offset, mtime))
+        
+        saved = self.save_usage_entries(entries)
+        
+        if self.db is None:
+            self.conn.commit()
+        return saved
     
     def _extract_usage_from_line(self, data: Dict) -> Optional[Dict]:
         """
@@ -173,7 +436,7 @@ class SessionParser:
             'output_cost': output_cost,
             'total_cost': total_cost,
             'timestamp': timestamp,
-            'raw_data': json.dumps(data)  # Store raw data for debugging
+            'raw_data': pack(data) if self.store_raw else None  # Raw data for debugging
         }
         
         return entry
@@ -188,34 +451,7 @@ class SessionParser:
         Returns:
             Inferred provider name
         """
-        model_lower = model.lower()
-        
-        # OpenAI models
-        if any(prefix in model_lower for prefix in ['gpt-', 'o1-', 'text-', 'dall-e']):
-            return 'openai'
-        
-        # Anthropic models
-        elif any(prefix in model_lower for prefix in ['claude-', 'anthropic']):
-            return 'anthropic'
-        
-        # Google models
-        elif any(prefix in model_lower for prefix in ['gemini-', 'palm-', 'google']):
-            return 'google'
-        
-        # DeepSeek models
-        elif any(prefix in model_lower for prefix in ['deepseek-']):
-            return 'deepseek'
-        
-        # Cohere models
-        elif any(prefix in model_lower for prefix in ['command-', 'cohere']):
-            return 'cohere'
-        
-        # Mistral models
-        elif any(prefix in model_lower for prefix in ['mistral-', 'mixtral']):
-            return 'mistral'
-        
-        # Default to unknown
-        return 'unknown'
+        return _infer_provider(model)
     
     def save_usage_entries(self, entries: List[Dict]) -> int:
         """
@@ -237,7 +473,52 @@ class SessionParser:
             print("Error: Could not connect to database")
             return 0
         
-        saved_count = 0
+        # A parser with its own connection holds one write transaction for
+        # the whole batch; a shared Database's transaction belongs to its owner
+        if self.db is None and not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        
+        try:
+            if not self._caches_primed:
+                self._prime_caches()
+            
+            rows = self._build_usage_rows(entries)
+            
+            self._insert_usage_rows(rows)
+            
+            if rows:
+                # Cached summaries no longer reflect the usage table
+                self.cursor.execute("DELETE FROM summary_cache")
+        except Exception:
+            if self.db is None:
+                self.conn.rollback()
+                self.clear_caches()
+            raise
+        
+        if self.db is None:
+            self.conn.commit()
+        return len(rows)
+    
+    def _insert_usage_rows(self, rows: List[Tuple]):
+        """Insert usage_entries rows in multi-row batches"""
+        full = len(rows) - len(rows) % USAGE_ROWS_PER_STMT
+        
+        for start in range(0, full, USAGE_ROWS_PER_STMT):
+            batch = rows[start:start + USAGE_ROWS_PER_STMT]
+            self.cursor.execute(USAGE_INSERT_BATCH_SQL, list(chain.from_iterable(batch)))
+        
+        if full < len(rows):
+            self.cursor.executemany(USAGE_INSERT_ROW_SQL, rows[full:])
+    
+    def _build_usage_rows(self, entries: List[Dict]) -> List[Tuple]:
+        """
+        Resolve provider/model/session ids and costs for each entry
+        
+        Returns:
+            List of usage_entries parameter tuples; entries that fail are
+            reported and skipped
+        """
+        rows = []
         
         for entry in entries:
             try:
@@ -263,14 +544,7 @@ class SessionParser:
                         output_cost = entry['output_tokens'] * model_pricing['output_cost']
                         total_cost = input_cost + output_cost
                 
-                # Insert usage entry
-                self.cursor.execute("""
-                INSERT INTO usage_entries 
-                (session_id, model_id, input_tokens, output_tokens, 
-                 cache_read_tokens, cache_write_tokens, input_cost, output_cost,
-                 cache_read_cost, cache_write_cost, total_cost, timestamp, metadata_json)
-                VALUES (?, ?, ?, ?, 0, 0, ?, ?, 0, 0, ?, ?, ?)
-                """, (
+                rows.append((
                     session_id,
                     model_id,
                     entry['input_tokens'],
@@ -282,33 +556,41 @@ class SessionParser:
                     entry['raw_data']
                 ))
                 
-                saved_count += 1
-                
             except Exception as e:
                 print(f"Error saving entry: {e}")
                 continue
         
-        self.conn.commit()
-        return saved_count
+        return rows
     
     def _get_or_create_provider(self, provider_name: str) -> int:
         """Get or create provider in database"""
         if not provider_name:
             provider_name = 'unknown'
         
+        provider_id = self._provider_cache.get(provider_name)
+        if provider_id is not None:
+            return provider_id
+        
+        if SQLITE_HAS_RETURNING:
+            # Returns no row if the provider already exists
+            self.cursor.execute(PROVIDER_UPSERT_SQL, (provider_name, PARSED_PROVIDER_CONFIG))
+            result = self.cursor.fetchone()
+            if result:
+                self._provider_cache[provider_name] = result[0]
+                return result[0]
+        
         # Check if provider exists
-        self.cursor.execute("SELECT id FROM providers WHERE name = ?", (provider_name,))
+        self.cursor.execute(PROVIDER_SELECT_SQL, (provider_name,))
         result = self.cursor.fetchone()
         
         if result:
+            self._provider_cache[provider_name] = result[0]
             return result[0]
         
         # Create new provider
-        self.cursor.execute("""
-        INSERT INTO providers (name, config_json)
-        VALUES (?, ?)
-        """, (provider_name, json.dumps({"source": "parsed_from_session"})))
+        self.cursor.execute(PROVIDER_INSERT_SQL, (provider_name, PARSED_PROVIDER_CONFIG))
         
+        self._provider_cache[provider_name] = self.cursor.lastrowid
         return self.cursor.lastrowid
     
     def _get_or_create_model(self, provider_id: int, model_name: str) -> int:
@@ -319,73 +601,107 @@ class SessionParser:
         # Create model_id from name (simplified)
         model_id = re.sub(r'[^a-zA-Z0-9_-]', '-', model_name.lower())
         
+        cached_id = self._model_cache.get((provider_id, model_id))
+        if cached_id is not None:
+            return cached_id
+        
+        if SQLITE_HAS_RETURNING:
+            # Returns no row if the model already exists
+            self.cursor.execute(MODEL_UPSERT_SQL, (provider_id, model_id, model_name))
+            result = self.cursor.fetchone()
+            if result:
+                self._model_cache[(provider_id, model_id)] = result[0]
+                self._pricing_cache[result[0]] = None
+                return result[0]
+        
         # Check if model exists
-        self.cursor.execute("""
-        SELECT id FROM models 
-        WHERE provider_id = ? AND model_id = ?
-        """, (provider_id, model_id))
+        self.cursor.execute(MODEL_SELECT_SQL, (provider_id, model_id))
         
         result = self.cursor.fetchone()
         
         if result:
+            self._model_cache[(provider_id, model_id)] = result[0]
             return result[0]
         
         # Create new model
-        self.cursor.execute("""
-        INSERT INTO models (provider_id, model_id, name)
-        VALUES (?, ?, ?)
-        """, (provider_id, model_id, model_name))
+        self.cursor.execute(MODEL_INSERT_SQL, (provider_id, model_id, model_name))
         
+        self._model_cache[(provider_id, model_id)] = self.cursor.lastrowid
+        self._pricing_cache[self.cursor.lastrowid] = None
         return self.cursor.lastrowid
     
     def _get_or_create_session(self, session_key: Optional[str], timestamp: str) -> int:
         """Get or create session in database"""
         if not session_key:
-            # Generate a session key from timestamp
-            session_key = f"session-{hash(timestamp) % 1000000}"
-        
-        # Check if session exists
-        self.cursor.execute("SELECT id FROM sessions WHERE session_key = ?", (session_key,))
-        result = self.cursor.fetchone()
-        
-        if result:
-            return result[0]
-        
-        # Parse timestamp
-        try:
-            started_at = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-        except:
-            started_at = datetime.now()
-        
-        # Create new session
-        self.cursor.execute("""
-        INSERT INTO sessions (session_key, started_at)
-        VALUES (?, ?)
-        """, (session_key, started_at.isoformat()))
+            # Generate a session key from timestamp. hash() is salted per
+            # process, so it would give the same session a new key each run.
+            session_key = "session-" + hashlib.blake2b(str(timestamp).encode(), digest_size=8).hexdigest()
+        
+        session_id = self._session_cache.get(session_key)
+        if session_id is not None:
+            return session_id
+        
+        if not SQLITE_HAS_RETURNING:
+            # Check if session exists
+            self.cursor.execute(SESSION_SELECT_SQL, (session_key,))
+            result = self.cursor.fetchone()
+            
+            if result:
+                self._session_cache[session_key] = result[0]
+                return result[0]
+        
+        # ISO 8601 timestamps are stored as given; anything else is
+        # normalized through datetime
+        if isinstance(timestamp, str) and ISO_TIMESTAMP_RE.fullmatch(timestamp):
+            started_at = timestamp
+        else:
+            try:
+                started_at = _normalize_timestamp(timestamp)
+            except Exception:
+                started_at = datetime.now().isoformat()
+        
+        # Create new session, or get the existing one's id
+        if SQLITE_HAS_RETURNING:
+            self.cursor.execute(SESSION_UPSERT_SQL, (session_key, started_at))
+            result = self.cursor.fetchone()
+            if result is None:
+                # Session already exists
+                self.cursor.execute(SESSION_SELECT_SQL, (session_key,))
+                result = self.cursor.fetchone()
+            session_id = result[0]
+        else:
+            self.cursor.execute(SESSION_INSERT_SQL, (session_key, started_at))
+            session_id = self.cursor.lastrowid
         
-        return self.cursor.lastrowid
+        self._session_cache[session_key] = session_id
+        return session_id
     
     def _get_model_pricing(self, model_id: int) -> Optional[Dict]:
         """Get model pricing from database"""
-        self.cursor.execute("""
-        SELECT input_cost, output_cost 
-        FROM models 
-        WHERE id = ?
-        """, (model_id,))
+        if model_id in self._pricing_cache:
+            return self._pricing_cache[model_id]
+        
+        self.cursor.execute(MODEL_PRICING_SQL, (model_id,))
         
         result = self.cursor.fetchone()
         if result and result[0] is not None and result[1] is not None:
-            return {'input_cost': result[0], 'output_cost': result[1]}
+            pricing = {'input_cost': result[0], 'output_cost': result[1]}
+        else:
+            pricing = None
         
-        return None
+        self._pricing_cache[model_id] = pricing
+        return pricing
     
-    def parse_directory(self, directory_path: str, recursive: bool = True) -> Tuple[int, int]:
+    def parse_directory(self, directory_path: str, recursive: bool = True,
+                        jobs: int = 1) -> Tuple[int, int]:
         """
         Parse all session files in a directory
         
         Args:
             directory_path: Path to directory containing session files
             recursive: Whether to search recursively
+            jobs: Number of worker processes used to parse files. Parsing is
+                  fanned out; saving always happens in this process.
             
         Returns:
             Tuple of (files_processed, entries_processed)
@@ -406,16 +722,106 @@ class SessionParser:
         
         print(f"Found {len(session_files)} session files")
         
-        for session_file in session_files:
-            print(f"Processing: {session_file}")
-            
-            entries_processed, entries = self.parse_session_file(str(session_file))
-            
-            if entries:
-                saved = self.save_usage_entries(entries)
-                print(f"  Saved {saved} usage entries")
-                total_entries += saved
+        if not self.conn:
+            self.connect()
+        
+        # Files are read from the offset stored by the previous parse, so
+        # already-saved lines are neither re-read nor saved twice. Files are
+        # read to the end: a last line without a newline is still parsed
+        # unless it is half-written, in which case a later run picks it up.
+        unread = self._unread_files(session_files)
+        
+        if jobs > 1 and len(session_files) > 1:
+            # Workers parse, this process is the only writer. At most
+            # PARSE_QUEUE_DEPTH tasks per worker are in flight, so parsed
+            # results can't pile up in memory faster than they are saved.
+            pending = set()
             
-            files_processed += 1
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                while True:
+                    while len(pending) < jobs * PARSE_QUEUE_DEPTH:
+                        chunk = list(islice(unread, PARSE_CHUNK_SIZE))
+                        if not chunk:
+                            break
+                        pending.add(executor.submit(_parse_files_worker, chunk, self.store_raw))
+                    
+                    if not pending:
+                        break
+                    
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for file_path, entries, offset, mtime in future.result():
+                            print(f"Processing: {file_path}")
+                            total_entries += self._save_file_entries(file_path, entries, offset, mtime)
+                            files_processed += 1
+        else:
+            for file_path, offset, mtime in unread:
+                print(f"Processing: {file_path}")
+                
+                entries, offset = self.parse_session_tail(file_path, offset, final=True)
+                total_entries += self._save_file_entries(file_path, entries, offset, mtime)
+                files_processed += 1
         
-        return files_processed, total_entries
\ No newline at end of file
+        return files_processed, total_entries
+    
+    def _save_file_entries(self, file_path: str, entries: List[Dict],
+                           offset: int, mtime: float) -> int:
+        """Save the entries parsed from one file and report the count"""
+        saved = self._save_file_tail(file_path, entries, offset, mtime)
+        if saved:
+            print(f"  Saved {saved} usage entries")
+        return saved
+
+
+@lru_cache(maxsize=1024)
+def _infer_provider(model: str) -> str:
+    """Provider for a model name; names repeat, so results are cached"""
+    match = _PROVIDER_RE.match(model.lower())
+    return match.lastgroup if match else 'unknown'
+
+
+@lru_cache(maxsize=256)
+def _normalize_timestamp(timestamp: str) -> str:
+    """ISO 8601 form of a timestamp datetime can parse"""
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).isoformat()
+
+
+def _read_lines(file_path: str, offset: int = 0) -> bytes:
+    """Read a file from a byte offset to its end"""
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        return f.read()
+
+
+def _is_complete_line(tail: bytes) -> bool:
+    """Whether the unterminated data at the end of a file is whole JSON (or blank)"""
+    if tail.isspace():
+        return True
+    
+    try:
+        loads(tail)
+    except ValueError:
+        return False
+    return True
+
+
+def _parse_files_worker(files: List[Tuple[str, int, float]],
+                        store_raw: bool = False) -> List[Tuple[str, List[Dict], int, float]]:
+    """
+    Parse session files from their offsets in a worker process (no database access)
+    
+    Args:
+        files: (path, offset, mtime) tuples
+        store_raw: Keep raw log lines with the entries
+        
+    Returns:
+        (path, entries, new offset, mtime) tuple per file
+    """
+    parser = SessionParser(store_raw=store_raw)
+    results = []
+    
+    for file_path, offset, mtime in files:
+        entries, offset = parser.parse_session_tail(file_path, offset, final=True)
+        results.append((file_path, entries, offset, mtime))
+    
+    return results
@@ -0,0 +1,63 @@
+"""
+Serialization module for AI Usage Tracker
+JSON helpers that use orjson when it is installed and fall back to the stdlib,
+and compression of stored metadata when zstandard is installed
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Frame header that starts every zstd-compressed value
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_LEVEL = 3
+
+
+if orjson is not None:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    loads = orjson.loads
+    
+    def dumps(obj) -> bytes:
+        """Serialize obj to compact UTF-8 encoded JSON"""
+        return orjson.dumps(obj, default=str)
+else:
+    loads = json.loads
+    
+    def dumps(obj) -> bytes:
+        """Serialize obj to compact UTF-8 encoded JSON"""
+        return json.dumps(obj, default=str, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+if zstandard is not None:
+    _compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    _decompressor = zstandard.ZstdDecompressor()
+    
+    def pack(obj):
+        """Serialize obj for storage as a zstd-compressed JSON blob"""
+        return _compressor.compress(dumps(obj))
+else:
+    _decompressor = None
+    
+    def pack(obj):
+        """Serialize obj for storage as JSON text"""
+        return dumps(obj).decode()
+
+
+def unpack(value) -> str:
+    """JSON text of a value written by pack(), compressed or not"""
+    if isinstance(value, bytes):
+        if value.startswith(ZSTD_MAGIC):
+            if _decompressor is None:
+                raise RuntimeError("Compressed metadata requires zstandard: pip install zstandard")
+            value = _decompressor.decompress(value)
+        return value.decode()
+    return value
@@ -0,0 +1,53 @@
+"""
+Shared pytest fixtures for AI Usage Tracker tests
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add the package to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_sqlite():
+    """Skip fsyncs on every connection the tests open; their databases are throwaway"""
+    from ai_usage_tracker import database
+    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(database, "CONNECTION_PRAGMAS",
+                   database.CONNECTION_PRAGMAS + ("PRAGMA synchronous = OFF",))
+        yield
+
+@pytest.fixture(scope="session")
+def db_path(tmp_path_factory, fast_sqlite):
+    """Database initialized once per session (one per xdist worker)"""
+    from ai_usage_tracker.cli import get_db
+    from ai_usage_tracker.database import Database
+    
+    path = str(tmp_path_factory.mktemp("db") / "usage.db")
+    Database(path).initialize()
+    
+    # Open the CLI's shared connection up front, writable, so every
+    # command run against this database reuses it instead of reopening
+    db = get_db(path)
+    yield path
+    db.close()
+
+@pytest.fixture
+def run_cli():
+    """Run the CLI with the given arguments"""
+    def run(*args):
+        from ai_usage_tracker.cli import main
+        main(list(args))
+    return run
+
+@pytest.fixture
+def unshared_db(monkeypatch):
+    """Run without the session's shared connection, closing whatever the test opens"""
+    from ai_usage_tracker import cli
+    monkeypatch.setattr(cli, "_DB_SINGLETON", None)
+    yield
+    if cli._DB_SINGLETON is not None:
+        cli._DB_SINGLETON.close()
@@ -3,26 +3,16 @@
 Test runner for AI Usage Tracker CLI
 """
 
-import unittest
 import sys
 import os
 
-# Add the project root to the Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pytest
 
 def run_tests():
     """Discover and run all tests"""
-    # Discover tests in the tests directory
-    loader = unittest.TestLoader()
-    start_dir = os.path.join(os.path.dirname(__file__), 'tests')
-    suite = loader.discover(start_dir, pattern='test_*.py')
-    
-    # Run tests
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # Return exit code based on test results
-    return 0 if result.wasSuccessful() else 1
+    # Point pytest at the project root so it picks up conftest.py and the
+    # settings in pyproject.toml from any working directory
+    return pytest.main([os.path.dirname(os.path.abspath(__file__)), *sys.argv[1:]])
 
 if __name__ == '__main__':
-    sys.exit(run_tests())
\ No newline at end of file
+    sys.exit(run_tests())
@@ -4,45 +4,109 @@ Sponsor information for AI Usage Tracker CLI
 This script can be integrated into the CLI to show sponsor information.
 """
 
+import os
+import shutil
 import sys
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Final
 
-SPONSOR_INFO = """
-╔══════════════════════════════════════════════════════════════╗
-║                    Support AI Usage Tracker                  ║
-╠══════════════════════════════════════════════════════════════╣
-║                                                              ║
-║  This tool is developed as open source software.            ║
-║  Your sponsorship helps fund development and maintenance.    ║
-║                                                              ║
-║  🏆 Sponsor Tiers:                                           ║
-║    • Supporter: $3/month - Name in README, early access     ║
-║    • Sponsor: $10/month - Priority support, custom configs  ║
-║    • Organization: $50/month - Custom integrations, logo    ║
-║                                                              ║
-║  📍 Sponsor now: https://github.com/sponsors/mverrilli      ║
-║                                                              ║
-╚══════════════════════════════════════════════════════════════╝
-"""
+# Box width for wide terminals; narrower ones get a narrower box
+BOX_WIDTH = 64
 
-def show_sponsor_info():
-    """Display sponsor information"""
-    print(SPONSOR_INFO)
+SPONSOR_TITLE: Final[str] = "Support AI Usage Tracker"
 
-def get_sponsor_command_suggestion():
-    """Return a suggestion for adding sponsor command to CLI"""
-    return """
-To add sponsor information to your CLI:
+SPONSOR_LINES = (
+    "",
+    "This tool is developed as open source software.",
+    "Your sponsorship helps fund development and maintenance.",
+    "",
+    "🏆 Sponsor Tiers:",
+    "  • Supporter: $3/month - Name in README, early access",
+    "  • Sponsor: $10/month - Priority support, custom configs",
+    "  • Organization: $50/month - Custom integrations, logo",
+    "",
+    "📍 Sponsor now: https://github.com/sponsors/mverrilli",
+    "",
+)
+
+def _display_width(text):
+    """Terminal columns taken by text (wide characters count twice)"""
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+
+def _pad(text, width):
+    """Pad text with spaces to the given display width"""
+    return text + " " * (width - _display_width(text))
+
+# Narrowest box that still fits every line with its margins
+_MIN_BOX_WIDTH = max(_display_width(line) for line in SPONSOR_LINES) + 6
+
+def _render_text(width):
+    """Banner framed in a box of the given width"""
+    if width < _MIN_BOX_WIDTH:
+        # Too narrow for the box: plain lines wrap better than a broken frame
+        return "\n" + "\n".join((SPONSOR_TITLE,) + SPONSOR_LINES) + "\n"
+    
+    inner = width - 2
+    lines = [
+        "╔" + "═" * inner + "╗",
+        "║" + SPONSOR_TITLE.center(inner) + "║",
+        "╠" + "═" * inner + "╣",
+    ]
+    lines.extend("║  " + _pad(line, inner - 2) + "║" for line in SPONSOR_LINES)
+    lines.append("╚" + "═" * inner + "╝")
+    return "\n" + "\n".join(lines) + "\n"
 
-1. Add this import to cli.py:
-   from .sponsor_info import show_sponsor_info
+@lru_cache(maxsize=8)
+def _render(width):
+    """Banner for a terminal width, as written to a UTF-8 stdout"""
+    return (_render_text(min(width, BOX_WIDTH)) + "\n").encode("utf-8")
 
-2. Add sponsor command parser:
+SPONSOR_INFO: Final[str] = _render_text(BOX_WIDTH)
+
+def show_sponsor_info():
+    """Display sponsor information"""
+    banner = _render(shutil.get_terminal_size().columns)
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None or (sys.stdout.encoding or "").lower() not in ("utf-8", "utf8"):
+        # Replaced or non-UTF-8 stdout: let it do the encoding, writing the
+        # whole banner at once so a line-buffered TTY flushes it only once
+        sys.stdout.write(banner.decode("utf-8"))
+        sys.stdout.flush()
+        return
+    
+    # Text written earlier may still be buffered in the wrapper
+    sys.stdout.flush()
+    try:
+        # Straight to the file descriptor, skipping the buffer's lock
+        fd = sys.stdout.fileno()
+        data = memoryview(banner)
+        while data:
+            data = data[os.write(fd, data):]
+    except OSError:
+        # No usable descriptor (e.g. captured output): go through the buffer
+        buffer.write(banner)
+        buffer.flush()
+
+# Integration suggestion, one span per step, for callers that need only part of it
+SUGGESTION_SPANS = MappingProxyType({
+    "intro": "To add sponsor information to your CLI:",
+    "import": """1. Add this import to cli.py:
+   from .sponsor_info import show_sponsor_info""",
+    "parser": """2. Add sponsor command parser:
    sponsor_parser = subparsers.add_parser("sponsor", help="Show sponsor information")
-   sponsor_parser.set_defaults(func=lambda args: show_sponsor_info())
+   sponsor_parser.set_defaults(func=lambda args: show_sponsor_info())""",
+    "epilog": """3. Or add to epilog/help text:
+   epilog=f\"\"\"{standard_epilog}\\n\\n{SPONSOR_INFO}\"\"\"""",
+})
 
-3. Or add to epilog/help text:
-   epilog=f\"\"\"{standard_epilog}\\n\\n{SPONSOR_INFO}\"\"\"
-"""
+# Built once; get_sponsor_command_suggestion hands out the same string
+_SUGGESTION: Final[str] = "\n" + "\n\n".join(SUGGESTION_SPANS.values()) + "\n"
+
+def get_sponsor_command_suggestion():
+    """Return a suggestion for adding sponsor command to CLI"""
+    return _SUGGESTION
 
 if __name__ == "__main__":
     show_sponsor_info()
@@ -1,62 +1,273 @@
 #!/usr/bin/env python3
 """
-Test script for AI Usage Tracker CLI
+Tests for the AI Usage Tracker CLI
 """
 
-import sys
-import os
+import pytest
 
-# Add the package to the path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-from ai_usage_tracker.cli import main
-
-def test_init():
+def test_init(run_cli, tmp_path, capsys):
     """Test database initialization"""
-    print("Testing database initialization...")
-    sys.argv = ["ai-usage-tracker", "init"]
-    main()
+    run_cli("init", "--db-path", str(tmp_path / "usage.db"))
+    assert "Database initialized successfully" in capsys.readouterr().out
 
-def test_status():
+def test_status(run_cli, db_path, capsys):
     """Test status command"""
-    print("\nTesting status command...")
-    sys.argv = ["ai-usage-tracker", "status"]
-    main()
+    run_cli("status", "--db-path", db_path)
+    assert "Database Status" in capsys.readouterr().out
 
-def test_providers():
+def test_providers(run_cli, db_path, capsys):
     """Test providers command"""
-    print("\nTesting providers command...")
-    sys.argv = ["ai-usage-tracker", "providers"]
-    main()
+    run_cli("providers", "--db-path", db_path)
+    assert "OPENAI" in capsys.readouterr().out
 
-def test_summary():
+def test_summary(run_cli, db_path, capsys):
     """Test summary command"""
-    print("\nTesting summary command...")
-    sys.argv = ["ai-usage-tracker", "summary"]
-    main()
+    run_cli("summary", "--db-path", db_path)
+    assert "No usage data found" in capsys.readouterr().out
 
-def test_budget_list():
+def test_budget_list(run_cli, db_path, capsys):
     """Test budget list command"""
-    print("\nTesting budget list command...")
-    sys.argv = ["ai-usage-tracker", "budget", "list"]
-    main()
-
-if __name__ == "__main__":
-    print("🧪 Testing AI Usage Tracker CLI")
-    print("=" * 50)
-    
-    try:
-        test_init()
-        test_status()
-        test_providers()
-        test_summary()
-        test_budget_list()
-        
-        print("\n" + "=" * 50)
-        print("✅ All tests completed successfully!")
-        
-    except Exception as e:
-        print(f"\n❌ Test failed: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
\ No newline at end of file
+    run_cli("budget", "--db-path", db_path, "list")
+    assert "All models" in capsys.readouterr().out
+
+def test_status_read_only(run_cli, db_path, unshared_db, capsys):
+    """Test a read-only command opens its own read-only connection"""
+    from ai_usage_tracker import cli
+    run_cli("status", "--db-path", db_path)
+    assert "Database Status" in capsys.readouterr().out
+    assert cli._DB_SINGLETON.read_only
+
+def test_status_missing_database(run_cli, tmp_path, unshared_db, capsys):
+    """Test status on a missing database points at init instead of creating it"""
+    path = tmp_path / "missing.db"
+    with pytest.raises(SystemExit):
+        run_cli("status", "--db-path", str(path))
+    assert "run 'ai-usage-tracker init' first" in capsys.readouterr().err
+    assert not path.exists()
+
+def test_main_batch(db_path, capsys):
+    """Test running several commands with one parser"""
+    from ai_usage_tracker.cli import main_batch
+    main_batch([
+        ["status", "--db-path", db_path],
+        ["providers", "--db-path", db_path],
+        ["budget", "--db-path", db_path, "list"],
+    ])
+    out = capsys.readouterr().out
+    assert "Database Status" in out
+    assert "OPENAI" in out
+    assert "All models" in out
+
+def test_fast_path_args():
+    """Test the argparse-free invocations match what argparse produces"""
+    from ai_usage_tracker.cli import FAST_PATH_ARGS, build_parser
+    parser = build_parser()
+    for argv, expected in FAST_PATH_ARGS.items():
+        assert vars(parser.parse_args(list(argv))) == expected
+
+def _usage_line(i):
+    """One session log line carrying usage, without its newline"""
+    return ('{"type": "message", "id": "s-%d", "timestamp": "2026-10-10T12:00:%02dZ", '
+            '"message": {"role": "assistant", "model": "gpt-4o", '
+            '"usage": {"input_tokens": 10, "output_tokens": 5}}}' % (i, i))
+
+def test_parse_without_trailing_newline(run_cli, tmp_path, unshared_db, capsys):
+    """Test the last line of a log is parsed even without a trailing newline"""
+    db = str(tmp_path / "usage.db")
+    logs = tmp_path / "sessions"
+    logs.mkdir()
+    lines = [_usage_line(i) for i in range(5)]
+    (logs / "session.jsonl").write_text("\n".join(lines))
+    
+    run_cli("init", "--db-path", db)
+    run_cli("parse", str(logs), "--db-path", db)
+    assert "Usage entries saved: 5" in capsys.readouterr().out
+    
+    # Nothing is left unread for the next run
+    run_cli("parse", str(logs), "--db-path", db)
+    out = capsys.readouterr().out
+    assert "Processing:" not in out
+    assert "Usage entries saved: 0" in out
+    
+    # A half-written last line is left until its writer finishes it
+    line = _usage_line(5)
+    with open(logs / "session.jsonl", "a") as f:
+        f.write("\n" + line[:60])
+    run_cli("parse", str(logs), "--db-path", db)
+    assert "Usage entries saved: 0" in capsys.readouterr().out
+    
+    with open(logs / "session.jsonl", "a") as f:
+        f.write(line[60:] + "\n")
+    run_cli("parse", str(logs), "--db-path", db)
+    out = capsys.readouterr().out
+    assert "error" not in out
+    assert "Usage entries saved: 1" in out
+
+def test_initialize_keeps_caller_connection(tmp_path):
+    """Test initialize leaves a connection the caller opened open"""
+    from ai_usage_tracker.database import Database
+    db = Database(str(tmp_path / "usage.db"))
+    db.connect()
+    db.initialize()
+    assert db.cursor.execute("SELECT COUNT(*) FROM providers").fetchone()[0] > 0
+    db.close()
+
+def test_schema_upgrade(run_cli, tmp_path, unshared_db, capsys):
+    """Test databases without the current schema are upgraded on writable connect"""
+    import sqlite3
+    from ai_usage_tracker.database import SCHEMA_VERSION
+    db = str(tmp_path / "usage.db")
+    run_cli("init", "--db-path", db)
+    
+    # Roll back to a database from before summary_cache existed
+    conn = sqlite3.connect(db)
+    conn.execute("DROP TABLE summary_cache")
+    conn.execute("PRAGMA user_version = 0")
+    conn.close()
+    capsys.readouterr()
+    
+    with pytest.raises(SystemExit):
+        run_cli("status", "--db-path", db)
+    assert "run 'ai-usage-tracker init' to upgrade" in capsys.readouterr().err
+    
+    run_cli("summary", "--db-path", db)
+    assert "No usage data found" in capsys.readouterr().out
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    conn.close()
+
+def _budget_rows(db):
+    """Every budget's id, scope and amount, and the budget id of every alert"""
+    import sqlite3
+    conn = sqlite3.connect(db)
+    budgets = conn.execute("""
+    SELECT id, provider_id, model_id, period, amount FROM budgets ORDER BY id
+    """).fetchall()
+    alerts = conn.execute("SELECT budget_id FROM alerts").fetchall()
+    conn.close()
+    return budgets, alerts
+
+def test_init_deduplicates_budgets(run_cli, tmp_path, unshared_db):
+    """Test init on an old database keeps one budget per scope and its alerts"""
+    import sqlite3
+    db = str(tmp_path / "usage.db")
+    run_cli("init", "--db-path", db)
+    
+    # Databases from before the unique index got a second set of default
+    # budgets from every init; one alert points at a duplicate
+    conn = sqlite3.connect(db)
+    conn.execute("DROP INDEX idx_budgets_scope")
+    conn.execute("""
+    INSERT INTO budgets (provider_id, model_id, period, amount, alert_threshold)
+    SELECT provider_id, model_id, period, amount, alert_threshold FROM budgets
+    """)
+    duplicate = conn.execute("SELECT MAX(id) FROM budgets").fetchone()[0]
+    conn.execute("""
+    INSERT INTO alerts (budget_id, alert_type, current_usage, current_budget, percentage)
+    VALUES (?, 'threshold', 9.0, 10.0, 0.9)
+    """, (duplicate,))
+    conn.commit()
+    conn.close()
+    
+    run_cli("init", "--db-path", db)
+    
+    budgets, alerts = _budget_rows(db)
+    scopes = [(provider_id, model_id, period) for _, provider_id, model_id, period, _ in budgets]
+    assert len(scopes) == len(set(scopes))
+    assert len(alerts) == 1
+    assert alerts[0][0] in [budget[0] for budget in budgets]
+
+def test_budget_set_updates_existing_scope(run_cli, tmp_path, unshared_db, capsys):
+    """Test budget set on an existing scope updates that budget"""
+    db = str(tmp_path / "usage.db")
+    run_cli("init", "--db-path", db)
+    before, _ = _budget_rows(db)
+    capsys.readouterr()
+    
+    run_cli("budget", "--db-path", db, "set", "--provider", "openai",
+            "--period", "daily", "--amount", "12.5")
+    assert "Updated budget ID" in capsys.readouterr().out
+    
+    after, _ = _budget_rows(db)
+    assert len(after) == len(before)
+    assert 12.5 in [budget[4] for budget in after]
+    
+    run_cli("budget", "--db-path", db, "set", "--provider", "openai",
+            "--period", "weekly", "--amount", "50")
+    assert "Created new budget ID" in capsys.readouterr().out
+    assert len(_budget_rows(db)[0]) == len(before) + 1
+
+def test_budget_set_unknown_scope(run_cli, tmp_path, unshared_db, capsys):
+    """Test budget set with an unknown provider or model writes nothing"""
+    db = str(tmp_path / "usage.db")
+    run_cli("init", "--db-path", db)
+    before, _ = _budget_rows(db)
+    capsys.readouterr()
+    
+    run_cli("budget", "--db-path", db, "set", "--provider", "nope",
+            "--period", "daily", "--amount", "1")
+    assert "Provider 'nope' not found" in capsys.readouterr().out
+    
+    run_cli("budget", "--db-path", db, "set", "--model", "nope",
+            "--period", "daily", "--amount", "1")
+    assert "Model 'nope' not found" in capsys.readouterr().out
+    
+    assert _budget_rows(db)[0] == before
+
+@pytest.fixture
+def session_parser(tmp_path):
+    """SessionParser on a fresh database, as the monitor uses it"""
+    from ai_usage_tracker.database import Database
+    from ai_usage_tracker.parser import SessionParser
+    path = str(tmp_path / "usage.db")
+    Database(path).initialize()
+    parser = SessionParser(path)
+    parser.connect()
+    yield parser
+    parser.close()
+
+def test_parse_file_appended(session_parser, tmp_path, monkeypatch):
+    """Test parse_file saves appended data once and skips unchanged files"""
+    from ai_usage_tracker import parser as parser_module
+    log = tmp_path / "session.jsonl"
+    log.write_text(_usage_line(0) + "\n" + _usage_line(1) + "\n")
+    assert session_parser.parse_file(str(log)) == 2
+    
+    with open(log, "a") as f:
+        f.write(_usage_line(2) + "\n")
+    assert session_parser.parse_file(str(log)) == 1
+    
+    # An unchanged file isn't read at all
+    def fail_read(*args):
+        raise AssertionError("unchanged file was read")
+    monkeypatch.setattr(parser_module, "_read_lines", fail_read)
+    assert session_parser.parse_file(str(log)) == 0
+    
+    count = session_parser.cursor.execute("SELECT COUNT(*) FROM usage_entries").fetchone()[0]
+    assert count == 3
+
+def test_parse_file_truncated(session_parser, tmp_path):
+    """Test parse_file re-reads a truncated file from the start"""
+    log = tmp_path / "session.jsonl"
+    log.write_text("".join(_usage_line(i) + "\n" for i in range(3)))
+    assert session_parser.parse_file(str(log)) == 3
+    
+    log.write_text(_usage_line(3) + "\n")
+    assert session_parser.parse_file(str(log)) == 1
+
+def test_parse_file_partial_line(session_parser, tmp_path):
+    """Test parse_file holds back a half-written last line until it is finished"""
+    log = tmp_path / "session.jsonl"
+    line = _usage_line(1)
+    log.write_text(_usage_line(0) + "\n" + line[:60])
+    assert session_parser.parse_file(str(log)) == 1
+    assert str(log) in session_parser.partial_files
+    
+    # Unchanged since, but still not valid JSON: keeps waiting
+    assert session_parser.parse_file(str(log)) == 0
+    assert str(log) in session_parser.partial_files
+    
+    with open(log, "a") as f:
+        f.write(line[60:] + "\n")
+    assert session_parser.parse_file(str(log)) == 1
+    assert not session_parser.partial_files